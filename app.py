@@ -1,17 +1,26 @@
 import os
 import threading
 import time
+import gzip
+import hashlib
 import json
+import mimetypes
+import queue
+import re
 import sqlite3
 from copy import deepcopy
 from datetime import datetime, timedelta
 from contextlib import contextmanager
 import signal
+import calendar
 import subprocess
 import shutil
+import zlib
 
-from flask import Flask, jsonify, render_template, request
-from flask_socketio import SocketIO, emit
+from flask import Flask, jsonify, render_template, request, send_from_directory, url_for
+from flask.json.provider import DefaultJSONProvider
+from markupsafe import Markup
+from flask_socketio import SocketIO, emit, join_room, leave_room
 
 # Import Telegram bot module
 try:
@@ -38,6 +47,16 @@ except ImportError:
     REQUESTS_AVAILABLE = False
     requests = None
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "local-admin")
 
@@ -84,10 +103,75 @@ level_config = {"preMinutes": 12, "postMinutes": 10, "lateLevels": 10}
 
 state_lock = threading.Lock()
 
+if orjson:
+    # Dates go through default() so they stay HTTP dates, like the stdlib provider
+    ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider on orjson when it's installed, stdlib json otherwise.
+
+    Output matches the default provider (sorted keys, compact unless debug)
+    except that non-ASCII text is written as UTF-8 instead of \\u escapes.
+    Calls with stdlib-specific keyword arguments use the stdlib encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        option = ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option), mimetype=self.mimetype
+        )
+
+
+class SocketIOJSON:
+    """json module stand-in for python-socketio, backed by app.json.
+
+    python-socketio passes separators=...; the output is compact anyway.
+    """
+
+    @staticmethod
+    def dumps(obj, **_kwargs):
+        return app.json.dumps(obj)
+
+    @staticmethod
+    def loads(s, **_kwargs):
+        return app.json.loads(s)
+
+
 app = Flask(__name__, static_folder="static", template_folder="templates")
+app.json = FastJSONProvider(app)
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "pulse-timer-secret")
-# Use eventlet async_mode for production with gunicorn
-socketio = SocketIO(app, async_mode="eventlet", cors_allowed_origins="*")
+# eventlet: gunicorn -k eventlet (production). asgi: uvicorn asgi:application,
+# where asgi.py serves Socket.IO itself and this server is never started.
+SERVER_MODE = os.environ.get("SERVER_MODE", "eventlet")
+# Broadcasts are encoded once per emit and the same packet goes to every client.
+socketio = SocketIO(
+    app, async_mode="threading" if SERVER_MODE == "asgi" else "eventlet",
+    cors_allowed_origins="*", json=SocketIOJSON,
+)
+
+# Server-side emits (timer ticks, change notifications) go through
+# socket_emitter; asgi.py swaps in an emitter that hands them to its loop.
+socket_emitter = socketio
+
+
+def broadcast(event, payload, to=None):
+    socket_emitter.emit(event, payload, to=to)
 
 # Add headers to allow Telegram widget to work
 # This fixes "Bot domain invalid" error in Telegram Web
@@ -101,6 +185,78 @@ def set_security_headers(response):
     response.headers.pop('Content-Security-Policy', None)
     return response
 
+# Response compression for JSON/HTML/CSV. Bodies under COMPRESS_MIN_SIZE
+# bytes go out as is (the headers would eat the saving); streamed bodies are
+# compressed chunk by chunk and flushed, so nothing is held back.
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_MIMETYPES = {
+    "application/json", "application/javascript", "text/javascript",
+    "text/html", "text/css", "text/csv", "text/plain",
+}
+COMPRESS_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)  # preferred first
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # per-request bodies: smaller than gzip -6 at a similar speed
+
+
+def no_compression(view):
+    """Opt a route out of response compression."""
+    view.no_compression = True
+    return view
+
+
+def compress_body(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def compress_stream(chunks, encoding):
+    """Compress a streamed body, flushing after every chunk."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+@app.after_request
+def compress_response(response):
+    if getattr(app.view_functions.get(request.endpoint), "no_compression", False):
+        return response
+    # Already encoded (pre-rendered pages, /assets/), files, partial and empty bodies
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.direct_passthrough
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    
+    response.vary.add("Accept-Encoding")
+    encoding = next((e for e in COMPRESS_ENCODINGS if e in request.accept_encodings), None)
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        original = response.response
+        response.response = compress_stream(response.iter_encoded(), encoding)
+        response.headers.pop("Content-Length", None)
+        if hasattr(original, "close"):
+            response.call_on_close(original.close)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(compress_body(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
 # Use persistent storage path if available, otherwise use local path
 # For production: use /data directory (mounted persistent volume)
 # For local: use current directory or local_db for local version
@@ -152,234 +308,337 @@ def get_db():
         conn.close()
 
 
+def add_column(db, table, column, definition):
+    """ALTER TABLE ADD COLUMN unless the column is already there (pre-migration databases)."""
+    columns = {row["name"] for row in db.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def migration_001_base_schema(db):
+    """Tables as of the first versioned release; adds columns older databases lack."""
+    # Tournaments table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            month TEXT,
+            year INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Players table - now uses telegram_id as primary identifier
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            telegram_id TEXT UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(telegram_id)
+        )
+    """)
+    
+    # Tournament results table (like Google Sheets - each game is a column)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS tournament_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            player_id INTEGER NOT NULL,
+            game_number INTEGER NOT NULL,
+            score INTEGER DEFAULT 0,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments(id),
+            FOREIGN KEY (player_id) REFERENCES players(id),
+            UNIQUE(tournament_id, player_id, game_number)
+        )
+    """)
+    
+    # Bounty table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS player_bounties (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            player_id INTEGER NOT NULL,
+            bounty INTEGER DEFAULT 0,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments(id),
+            FOREIGN KEY (player_id) REFERENCES players(id),
+            UNIQUE(tournament_id, player_id)
+        )
+    """)
+    
+    # Events table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            description TEXT,
+            max_places INTEGER DEFAULT 20,
+            price INTEGER DEFAULT 1000,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(date, time, event_type)
+        )
+    """)
+    add_column(db, "events", "max_places", "INTEGER DEFAULT 20")
+    add_column(db, "events", "price", "INTEGER DEFAULT 1000")
+    
+    # Event registrations table
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS event_registrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            telegram_username TEXT,
+            telegram_id TEXT,
+            registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+            UNIQUE(event_id, telegram_id)
+        )
+    """)
+    add_column(db, "event_registrations", "telegram_username", "TEXT")
+    add_column(db, "event_registrations", "telegram_id", "TEXT")
+    db.execute("CREATE UNIQUE INDEX IF NOT EXISTS event_registrations_unique ON event_registrations(event_id, telegram_id)")
+    
+    # Tournament player states table (for poker tournaments)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS tournament_player_states (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            telegram_id TEXT,
+            has_rent BOOLEAN DEFAULT 0,
+            is_eliminated BOOLEAN DEFAULT 0,
+            reentry_count INTEGER DEFAULT 0,
+            addon_count INTEGER DEFAULT 0,
+            final_place INTEGER,
+            bonus_points INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+            UNIQUE(event_id, player_name)
+        )
+    """)
+    
+    # Simple rating list (set from the timer page)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS rating_players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            place INTEGER NOT NULL,
+            points INTEGER NOT NULL
+        )
+    """)
+    
+    # Telegram users table (for collecting bot users for mailing)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS telegram_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id TEXT NOT NULL UNIQUE,
+            first_name TEXT NOT NULL,
+            last_name TEXT,
+            username TEXT,
+            language_code TEXT,
+            is_bot BOOLEAN DEFAULT 0,
+            registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            registration_source TEXT DEFAULT 'telegram_widget',
+            offer_accepted BOOLEAN DEFAULT 0,
+            offer_accepted_at TIMESTAMP,
+            game_nickname TEXT
+        )
+    """)
+    add_column(db, "telegram_users", "offer_accepted", "BOOLEAN DEFAULT 0")
+    add_column(db, "telegram_users", "offer_accepted_at", "TIMESTAMP")
+    add_column(db, "telegram_users", "game_nickname", "TEXT")
+    
+    # Default players for a brand new database
+    if not db.execute("SELECT 1 FROM players LIMIT 1").fetchone():
+        db.executemany("INSERT INTO players (name) VALUES (?)", [(name,) for name in [
+            "13 reason for", "ANDREYU", "Abrasha", "tolch__", "Artem",
+            "Art", "Fish2005", "St05", "Винни", "Psychoanya",
+            "kolyupaska", "apheristka", "Livinsl", "SergeyKoller",
+            "TanyaKoller", "dombrovich"
+        ]])
+
+
+def migration_002_poker_actions(db):
+    """Append-only log of poker actions; tournament_player_states is its fold."""
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS poker_actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            action TEXT NOT NULL,
+            place INTEGER,
+            undone BOOLEAN DEFAULT 0,
+            undo_of INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+        )
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS idx_poker_actions_player ON poker_actions(event_id, player_name)")
+    
+    # States written before the log existed get equivalent log entries once
+    if not db.execute("SELECT 1 FROM poker_actions LIMIT 1").fetchone():
+        backfill_poker_actions(db)
+
+
+def migration_003_tournament_month_index(db):
+    db.execute("CREATE INDEX IF NOT EXISTS idx_tournaments_year_month ON tournaments(year, month)")
+
+
+def migration_004_event_waitlist(db):
+    """Waitlist for full events, promoted in id (FIFO) order."""
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS event_waitlist (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            telegram_username TEXT,
+            telegram_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+            UNIQUE(event_id, telegram_id)
+        )
+    """)
+
+
+def migration_005_registrations_user_index(db):
+    """"My registrations" lookups go by user first."""
+    db.execute("CREATE INDEX IF NOT EXISTS idx_event_registrations_user ON event_registrations(telegram_id, event_id)")
+
+
+def migration_006_event_templates(db):
+    """Recurring events: one row per weekly slot, weekday 0 = Monday."""
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS event_templates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            weekday INTEGER NOT NULL,
+            time TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            description TEXT,
+            max_places INTEGER DEFAULT 20,
+            price INTEGER DEFAULT 1000,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(weekday, time, event_type)
+        )
+    """)
+
+
+def migration_007_seed_rating(db):
+    """Seed the simple rating with default_players, once per database.
+
+    Runs exactly once, so a rating an admin cleared later stays empty.
+    """
+    if not db.execute("SELECT 1 FROM rating_players LIMIT 1").fetchone():
+        db.executemany("INSERT INTO rating_players (name, place, points) VALUES (?, ?, ?)",
+                       rating_rows(default_players))
+
+
+# Schema migrations in order; PRAGMA user_version is the number of steps
+# applied. Only ever append: a released step must not change. Steps also
+# run against databases created before versioning (user_version 0), so
+# they stay idempotent.
+MIGRATIONS = [
+    migration_001_base_schema,
+    migration_002_poker_actions,
+    migration_003_tournament_month_index,
+    migration_004_event_waitlist,
+    migration_005_registrations_user_index,
+    migration_006_event_templates,
+    migration_007_seed_rating,
+]
+
+
+def migrate_schema(db):
+    """Apply pending migrations in one transaction; returns the number applied."""
+    target = len(MIGRATIONS)
+    if db.execute("PRAGMA user_version").fetchone()[0] >= target:
+        return 0
+    
+    # Another worker may be migrating; re-read the version under the write lock
+    db.execute("BEGIN IMMEDIATE")
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    for number in range(version + 1, target + 1):
+        print(f"🔄 Applying schema migration {number}: {MIGRATIONS[number - 1].__name__}")
+        MIGRATIONS[number - 1](db)
+    db.execute(f"PRAGMA user_version = {target}")
+    db.commit()
+    return max(target - version, 0)
+
+
 def init_db():
-    """Initialize database with required tables."""
+    """Bring the schema up to date and make sure the current month has its tournament."""
     with get_db() as db:
-        # Tournaments table
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS tournaments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                month TEXT,
-                year INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Players table - now uses telegram_id as primary identifier
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS players (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                telegram_id TEXT UNIQUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(telegram_id)
-            )
-        """)
-        
-        # Tournament results table (like Google Sheets - each game is a column)
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS tournament_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tournament_id INTEGER NOT NULL,
-                player_id INTEGER NOT NULL,
-                game_number INTEGER NOT NULL,
-                score INTEGER DEFAULT 0,
-                FOREIGN KEY (tournament_id) REFERENCES tournaments(id),
-                FOREIGN KEY (player_id) REFERENCES players(id),
-                UNIQUE(tournament_id, player_id, game_number)
-            )
-        """)
-        
-        # Bounty table
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS player_bounties (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tournament_id INTEGER NOT NULL,
-                player_id INTEGER NOT NULL,
-                bounty INTEGER DEFAULT 0,
-                FOREIGN KEY (tournament_id) REFERENCES tournaments(id),
-                FOREIGN KEY (player_id) REFERENCES players(id),
-                UNIQUE(tournament_id, player_id)
-            )
-        """)
+        if migrate_schema(db):
+            # WAL lets readers run while a registration holds the write lock
+            db.execute("PRAGMA journal_mode=WAL")
         
-        # Events table
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                time TEXT NOT NULL,
-                event_type TEXT NOT NULL,
-                description TEXT,
-                max_places INTEGER DEFAULT 20,
-                price INTEGER DEFAULT 1000,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(date, time, event_type)
-            )
-        """)
-        
-        # Event registrations table
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS event_registrations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_id INTEGER NOT NULL,
-                player_name TEXT NOT NULL,
-                telegram_username TEXT,
-                telegram_id TEXT,
-                registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
-                UNIQUE(event_id, telegram_id)
-            )
-        """)
-        
-        # Tournament player states table (for poker tournaments)
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS tournament_player_states (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_id INTEGER NOT NULL,
-                player_name TEXT NOT NULL,
-                telegram_id TEXT,
-                has_rent BOOLEAN DEFAULT 0,
-                is_eliminated BOOLEAN DEFAULT 0,
-                reentry_count INTEGER DEFAULT 0,
-                addon_count INTEGER DEFAULT 0,
-                final_place INTEGER,
-                bonus_points INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
-                UNIQUE(event_id, player_name)
-            )
-        """)
-        
-        # Telegram users table (for collecting bot users for mailing)
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS telegram_users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id TEXT NOT NULL UNIQUE,
-                first_name TEXT NOT NULL,
-                last_name TEXT,
-                username TEXT,
-                language_code TEXT,
-                is_bot BOOLEAN DEFAULT 0,
-                registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                registration_source TEXT DEFAULT 'telegram_widget'
-            )
-        """)
-        
-        # Migrate telegram_users table - add new columns if they don't exist
-        try:
-            db.execute("ALTER TABLE telegram_users ADD COLUMN offer_accepted BOOLEAN DEFAULT 0")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        try:
-            db.execute("ALTER TABLE telegram_users ADD COLUMN offer_accepted_at TIMESTAMP")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        try:
-            db.execute("ALTER TABLE telegram_users ADD COLUMN game_nickname TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Migrate events table - add new columns if they don't exist
-        try:
-            db.execute("ALTER TABLE events ADD COLUMN max_places INTEGER DEFAULT 20")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        try:
-            db.execute("ALTER TABLE events ADD COLUMN price INTEGER DEFAULT 1000")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Migrate existing table if columns don't exist
-        try:
-            db.execute("ALTER TABLE event_registrations ADD COLUMN telegram_username TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            db.execute("ALTER TABLE event_registrations ADD COLUMN telegram_id TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Update unique constraint if needed
-        try:
-            # Drop old unique constraint if exists
-            db.execute("CREATE UNIQUE INDEX IF NOT EXISTS event_registrations_unique ON event_registrations(event_id, telegram_id)")
-        except sqlite3.OperationalError:
-            pass
-        
-        # Telegram users table (for collecting bot users for mailing)
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS telegram_users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id TEXT NOT NULL UNIQUE,
-                first_name TEXT NOT NULL,
-                last_name TEXT,
-                username TEXT,
-                language_code TEXT,
-                is_bot BOOLEAN DEFAULT 0,
-                registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                registration_source TEXT DEFAULT 'telegram_widget',
-                offer_accepted BOOLEAN DEFAULT 0,
-                offer_accepted_at TIMESTAMP,
-                game_nickname TEXT
-            )
-        """)
-        
-        # Create default tournaments for November and December if none exist
-        result = db.execute("SELECT COUNT(*) as count FROM tournaments").fetchone()
-        tournament_id = None
-        if result["count"] == 0:
-            now = datetime.now()
-            year = now.year
-            
-            # Create November tournament
-            nov_tournament = db.execute("""
-                SELECT id FROM tournaments WHERE month = ? AND year = ?
-            """, ("November", year)).fetchone()
-            if not nov_tournament:
-                cursor = db.execute("""
-                    INSERT INTO tournaments (name, month, year)
-                    VALUES (?, ?, ?)
-                """, ("РЕЙТИНГ НОЯБРЯ", "November", year))
-                tournament_id = cursor.lastrowid
-            
-            # Create December tournament
-            dec_tournament = db.execute("""
-                SELECT id FROM tournaments WHERE month = ? AND year = ?
-            """, ("December", year)).fetchone()
-            if not dec_tournament:
-                cursor = db.execute("""
-                    INSERT INTO tournaments (name, month, year)
-                    VALUES (?, ?, ?)
-                """, ("РЕЙТИНГ ДЕКАБРЯ", "December", year))
-                if not tournament_id:
-                    tournament_id = cursor.lastrowid
+        # Make sure the current month has its rating tournament
+        now = datetime.now()
+        resolve_tournament(db, now.year, now.month)
+
+
+# Monthly rating tournaments are stored with the English month name;
+# older rows may use the Russian genitive form.
+MONTH_NAMES = [
+    None, "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+MONTH_NAMES_GENITIVE_RU = [
+    None, "января", "февраля", "марта", "апреля", "мая", "июня",
+    "июля", "августа", "сентября", "октября", "ноября", "декабря",
+]
+
+tournament_cache_lock = threading.Lock()
+tournament_cache = {}  # (year, month number) -> tournament id
+
+
+def month_number(month):
+    """Month number for an English or Russian (genitive) month name, or None."""
+    name = (month or "").strip().lower()
+    for idx in range(1, 13):
+        if name in (MONTH_NAMES[idx].lower(), MONTH_NAMES_GENITIVE_RU[idx]):
+            return idx
+    return None
+
+
+def load_tournament_cache():
+    """Fill the (year, month) -> tournament id cache with one query."""
+    with get_db() as db:
+        rows = db.execute("SELECT id, month, year FROM tournaments ORDER BY id").fetchall()
+    with tournament_cache_lock:
+        for row in rows:
+            number = month_number(row["month"])
+            if number and row["year"]:
+                tournament_cache.setdefault((row["year"], number), row["id"])
+
+
+def resolve_tournament(db, year, month):
+    """Get the rating tournament id for a month, creating it if needed."""
+    tournament_id = tournament_cache.get((year, month))
+    if tournament_id:
+        return tournament_id
+    
+    with tournament_cache_lock:
+        tournament_id = tournament_cache.get((year, month))
+        if tournament_id:
+            return tournament_id
+        row = db.execute("""
+            SELECT MIN(id) as id FROM tournaments
+            WHERE year = ? AND month IN (?, ?)
+        """, (year, MONTH_NAMES[month], MONTH_NAMES_GENITIVE_RU[month])).fetchone()
+        if row and row["id"]:
+            tournament_id = row["id"]
         else:
-            tournament = db.execute("SELECT id FROM tournaments ORDER BY id DESC LIMIT 1").fetchone()
-            tournament_id = tournament["id"] if tournament else None
-        
-        # Initialize default players if none exist
-        player_count = db.execute("SELECT COUNT(*) as count FROM players").fetchone()
-        if player_count["count"] == 0 and tournament_id:
-            default_players = [
-                "13 reason for", "ANDREYU", "Abrasha", "tolch__", "Artem",
-                "Art", "Fish2005", "St05", "Винни", "Psychoanya",
-                "kolyupaska", "apheristka", "Livinsl", "SergeyKoller",
-                "TanyaKoller", "dombrovich"
-            ]
-            for name in default_players:
-                try:
-                    cursor = db.execute("INSERT INTO players (name) VALUES (?)", (name,))
-                    player_id = cursor.lastrowid
-                except sqlite3.IntegrityError:
-                    # Player already exists, get ID
-                    player = db.execute("SELECT id FROM players WHERE name = ?", (name,)).fetchone()
-                    player_id = player["id"] if player else None
+            cursor = db.execute("""
+                INSERT INTO tournaments (name, month, year)
+                VALUES (?, ?, ?)
+            """, (f"РЕЙТИНГ {MONTH_NAMES_GENITIVE_RU[month].upper()}", MONTH_NAMES[month], year))
+            tournament_id = cursor.lastrowid
+        tournament_cache[(year, month)] = tournament_id
+        return tournament_id
 
 
 def minutes_for_level(index: int) -> int:
@@ -467,7 +726,155 @@ def complete_current_stage():
 
 
 def emit_state(payload=None):
-    socketio.emit("state", payload or build_state())
+    broadcast("state", payload or build_state())
+
+
+# Coalesced notifications: writes mark a resource dirty, and one emit per
+# (event, key) goes out when the window closes. 0 disables coalescing.
+EMIT_COALESCE_WINDOW = float(os.environ.get("EMIT_COALESCE_WINDOW", "0.3"))
+
+# Push mode: the changed rows are computed once at flush time and sent to the
+# resource's room, so subscribed clients don't refetch after every change.
+SOCKET_PUSH_MODE = os.environ.get("SOCKET_PUSH_MODE", "true") == "true"
+
+# Notification event -> subscription resource (room prefix)
+EMIT_RESOURCES = {
+    "tournament_update": "tournament",
+    "events_update": "events",
+    "rating_update": "rating",
+}
+
+emit_lock = threading.Lock()
+pending_emits = {}  # (event, key) -> (payload, dirty ids)
+emit_flush_timer = None
+emit_stats = {"queued": 0, "emitted": 0, "suppressed": 0, "flushes": 0}
+
+
+def resource_room(resource, key):
+    # Single-room resources (the simple rating) are keyed by None
+    if key is None:
+        return resource
+    return f"{resource}:{key}"
+
+
+def queue_emit(event, key, payload, dirty=None):
+    """Schedule a Socket.IO notification, merging repeats within the window.
+
+    ``dirty`` holds ids of the rows that changed (e.g. player ids for a
+    tournament); they are unioned across merged writes. A tuple ``key``
+    sends one notification to the rooms of all its keys; it carries no
+    rows, so clients refetch.
+    """
+    global emit_flush_timer
+    if EMIT_COALESCE_WINDOW <= 0:
+        with emit_lock:
+            emit_stats["queued"] += 1
+            emit_stats["emitted"] += 1
+        send_emit(event, key, payload, set(dirty or ()))
+        return
+
+    with emit_lock:
+        emit_stats["queued"] += 1
+        previous = pending_emits.get((event, key))
+        merged = set(dirty or ())
+        if previous is not None:
+            emit_stats["suppressed"] += 1
+            merged |= previous[1]
+        # Latest payload wins for a key
+        pending_emits[(event, key)] = (payload, merged)
+        if emit_flush_timer is None:
+            emit_flush_timer = threading.Timer(EMIT_COALESCE_WINDOW, flush_emits)
+            emit_flush_timer.daemon = True
+            emit_flush_timer.start()
+
+
+def flush_emits():
+    """Send every pending notification once and reset the window."""
+    global emit_flush_timer
+    with emit_lock:
+        batch = list(pending_emits.items())
+        pending_emits.clear()
+        emit_flush_timer = None
+        emit_stats["flushes"] += 1
+        emit_stats["emitted"] += len(batch)
+    for (event, key), (payload, dirty) in batch:
+        try:
+            send_emit(event, key, payload, dirty)
+        except Exception as e:
+            print(f"❌ Error emitting {event}: {e}")
+
+
+def send_emit(event, key, payload, dirty):
+    resource = EMIT_RESOURCES.get(event)
+    if not SOCKET_PUSH_MODE or not resource:
+        broadcast(event, payload)
+        return
+
+    if isinstance(key, tuple):
+        broadcast(event, payload, to=[resource_room(resource, k) for k in key])
+        return
+
+    builder = PUSH_BUILDERS.get(event)
+    if builder:
+        try:
+            payload = {**payload, **builder(key, dirty)}
+        except Exception as e:
+            # Clients refetch when the payload carries no rows
+            print(f"⚠️ Error building {event} payload: {e}")
+    broadcast(event, payload, to=resource_room(resource, key))
+
+
+def build_tournament_push(tournament_id, player_ids):
+    """Standings rows for the players whose cells changed."""
+    if not player_ids:
+        return {}
+    ids = sorted(player_ids)
+    placeholders = ",".join("?" * len(ids))
+    with get_db() as db:
+        rows = db.execute(f"SELECT id, name FROM players WHERE id IN ({placeholders})", ids).fetchall()
+        scores = db.execute(f"""
+            SELECT player_id, game_number, score
+            FROM tournament_results
+            WHERE tournament_id = ? AND player_id IN ({placeholders})
+        """, [tournament_id, *ids]).fetchall()
+        bounties = db.execute(f"""
+            SELECT player_id, bounty
+            FROM player_bounties
+            WHERE tournament_id = ? AND player_id IN ({placeholders})
+        """, [tournament_id, *ids]).fetchall()
+
+    players = {r["id"]: {"id": r["id"], "name": r["name"], "total": 0, "bounty": 0, "scores": {}} for r in rows}
+    for row in scores:
+        player = players.get(row["player_id"])
+        if player:
+            player["scores"][row["game_number"]] = row["score"]
+            player["total"] += row["score"]
+    for row in bounties:
+        player = players.get(row["player_id"])
+        if player:
+            player["bounty"] = row["bounty"]
+    return {"players": list(players.values())}
+
+
+def build_events_push(date, _dirty):
+    """Public rows of every event on the date, with registration counts."""
+    with get_db() as db:
+        events = query_events_feed(db, date, date)
+    return {"events": events}
+
+
+PUSH_BUILDERS = {
+    "tournament_update": build_tournament_push,
+    "events_update": build_events_push,
+}
+
+
+def get_emit_stats():
+    with emit_lock:
+        stats = dict(emit_stats)
+        stats["pending"] = len(pending_emits)
+    stats["window_seconds"] = EMIT_COALESCE_WINDOW
+    return stats
 
 
 def timer_loop():
@@ -518,18 +925,200 @@ def check_is_admin(game_nickname=None, telegram_id=None):
     
     return is_admin
 
+# Fingerprinted assets built by tools/build_static.py into static/dist/.
+# Their names change with their content, so they are cached for a year;
+# without a build, asset_url() falls back to the plain /static/ URL.
+STATIC_DIST_DIR = os.path.join(app.static_folder, "dist")
+ASSET_MAX_AGE = 365 * 24 * 3600
+ASSET_ENCODINGS = (("br", "br"), ("gzip", "gz"))  # (Content-Encoding, file suffix), preferred first
+
+
+def load_static_manifest():
+    try:
+        with open(os.path.join(STATIC_DIST_DIR, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}, "encodings": {}, "images": {}}
+
+
+static_manifest = load_static_manifest()
+
+
+def asset_url(filename):
+    """URL of a static file, fingerprinted when a build exists."""
+    hashed = static_manifest["files"].get(filename)
+    if hashed:
+        return url_for("serve_asset", filename=hashed)
+    return url_for("static", filename=filename)
+
+
+def picture_sources(filename, sizes):
+    """<source> tags with the AVIF/WebP variants of an image, for a <picture>."""
+    variants = static_manifest["images"].get(filename, {})
+    tags = []
+    for ext in ("avif", "webp"):
+        if ext in variants:
+            srcset = ", ".join(
+                f"{url_for('serve_asset', filename=hashed)} {width}w" for width, hashed in variants[ext]
+            )
+            tags.append(f'<source type="image/{ext}" srcset="{srcset}" sizes="{sizes}">')
+    return Markup("".join(tags))
+
+
+app.jinja_env.globals.update(asset_url=asset_url, picture_sources=picture_sources)
+
+
+@app.route("/assets/<path:filename>")
+def serve_asset(filename):
+    """Serve a fingerprinted asset, precompressed when the client accepts it."""
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    encodings = static_manifest["encodings"].get(filename, [])
+    content_encoding = None
+    for encoding, suffix in ASSET_ENCODINGS:
+        if suffix in encodings and encoding in request.accept_encodings:
+            content_encoding = encoding
+            filename = f"{filename}.{suffix}"
+            break
+    
+    response = send_from_directory(STATIC_DIST_DIR, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    if encodings:
+        response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+# Background music: a full and a low-bitrate (48 kbps mono) encoding of the
+# same track. Served with a content-hash ETag and Range support, so resuming
+# playback on the next page fetches only the bytes from the saved position.
+MEDIA_TRACKS = {
+    "music": {"full": "processed_audio.mp3", "low": "processed_audio_low.mp3"},
+}
+MEDIA_REVALIDATE_AGE = 3600
+
+media_etags = {}  # filename -> sha256 hex of the content
+
+
+def media_etag(filename):
+    etag = media_etags.get(filename)
+    if etag is None:
+        digest = hashlib.sha256()
+        with open(os.path.join(app.static_folder, filename), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        etag = media_etags.setdefault(filename, digest.hexdigest())
+    return etag
+
+
+def media_url(track, quality="full"):
+    """Versioned URL of a media track; the version makes it cacheable for good."""
+    filename = MEDIA_TRACKS[track][quality]
+    return url_for("serve_media", track=track, quality=quality, v=media_etag(filename)[:10])
+
+
+def prefers_low_bitrate():
+    """Save-Data or a mobile client hint / user agent."""
+    if request.headers.get("Save-Data", "").lower() == "on":
+        return True
+    if request.headers.get("Sec-CH-UA-Mobile") == "?1":
+        return True
+    return "Mobi" in request.headers.get("User-Agent", "")
+
+
+app.jinja_env.globals.update(media_url=media_url)
+
+
+@app.route("/media/<track>")
+def serve_media(track):
+    """Serve a media track with Range requests, strong ETag and caching.
+
+    ?quality=full|low picks the encoding; without it the low one goes to
+    clients that send Save-Data or look mobile.
+    """
+    variants = MEDIA_TRACKS.get(track)
+    if not variants:
+        return jsonify({"ok": False, "error": "unknown track"}), 404
+    quality = request.args.get("quality")
+    if quality not in variants:
+        quality = "low" if prefers_low_bitrate() else "full"
+    filename = variants[quality]
+    etag = media_etag(filename)
+    
+    versioned = request.args.get("v") == etag[:10]
+    
+    # send_file answers Range / If-Range / If-None-Match against the ETag
+    response = send_from_directory(
+        app.static_folder, filename, mimetype="audio/mpeg", etag=etag,
+        max_age=ASSET_MAX_AGE if versioned else MEDIA_REVALIDATE_AGE,
+    )
+    response.headers["Accept-Ranges"] = "bytes"
+    response.cache_control.public = True
+    if versioned:
+        response.cache_control.immutable = True
+    elif "quality" not in request.args:
+        response.vary.update(("Save-Data", "Sec-CH-UA-Mobile", "User-Agent"))
+    return response
+
+
+# The pages depend only on ADMIN_TOKEN and the asset manifest, both fixed for
+# the life of the process, so each one is rendered once and kept with its
+# gzip/br encodings. PAGE_CACHE=false renders on every hit (template work).
+PAGE_CACHE = os.environ.get("PAGE_CACHE", "true") == "true"
+PAGE_ENCODINGS = ("br", "gzip")  # preferred first
+
+rendered_pages = {}  # template -> {"etag": ..., "identity": bytes, "gzip": bytes, "br": bytes}
+
+
+def prerender_page(template):
+    html = render_template(template, is_admin=False, admin_token=ADMIN_TOKEN).encode("utf-8")
+    page = {
+        "etag": hashlib.sha256(html).hexdigest()[:16],
+        "identity": html,
+        "gzip": gzip.compress(html, compresslevel=9, mtime=0),
+    }
+    if brotli:
+        page["br"] = brotli.compress(html, quality=11)
+    return page
+
+
+def render_page(template, status=200):
+    """Response with a pre-rendered page, compressed if the client accepts it."""
+    page = rendered_pages.get(template) if PAGE_CACHE else None
+    if page is None:
+        page = prerender_page(template)
+        if PAGE_CACHE:
+            rendered_pages[template] = page
+    
+    content_encoding = next(
+        (encoding for encoding in PAGE_ENCODINGS if encoding in page and encoding in request.accept_encodings),
+        None,
+    )
+    response = app.response_class(page[content_encoding or "identity"], status=status, mimetype="text/html")
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    response.vary.add("Accept-Encoding")
+    if status == 200:
+        # Revalidate on every navigation; unchanged pages come back as 304
+        response.set_etag(f"{page['etag']}-{content_encoding or 'identity'}")
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+    return response
+
+
 @app.route("/")
 def index():
     """Main dashboard page with splash screen."""
     # Pages are accessible to everyone, admin status is checked dynamically on frontend
-    return render_template("dashboard.html", is_admin=False, admin_token=ADMIN_TOKEN)
+    return render_page("dashboard.html")
 
 
 @app.route("/timer")
 def timer():
     """Timer page."""
     # Pages are accessible to everyone, admin status is checked dynamically on frontend
-    return render_template("index.html", is_admin=False, admin_token=ADMIN_TOKEN)
+    return render_page("index.html")
 
 
 @app.route("/rating")
@@ -537,7 +1126,7 @@ def rating():
     """Rating page - accessible to everyone, admin status is checked dynamically on frontend."""
     try:
         # Pages are accessible to everyone, admin status is checked dynamically on frontend
-        return render_template("rating.html", is_admin=False, admin_token=ADMIN_TOKEN)
+        return render_page("rating.html")
     except Exception as e:
         print(f"❌ Error rendering rating page: {e}")
         import traceback
@@ -546,7 +1135,7 @@ def rating():
 
 @app.route("/contacts")
 def contacts():
-    return render_template("contacts.html")
+    return render_page("contacts.html")
 
 @app.route("/debug/logs")
 def debug_logs():
@@ -925,7 +1514,7 @@ def debug_admin():
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors by redirecting to main page."""
-    return render_template("dashboard.html", is_admin=False, admin_token=ADMIN_TOKEN), 404
+    return render_page("dashboard.html", status=404)
 
 
 @app.route("/api/rating")
@@ -934,135 +1523,155 @@ def api_rating():
     date_filter = request.args.get("date")  # Format: YYYY-MM-DD
     
     if date_filter:
-        # Filter to only players registered for events on this date
-        with get_db() as db:
-            # Get all players registered for events on this date
-            registered_players = db.execute("""
-                SELECT DISTINCT er.player_name, er.telegram_id
-                FROM event_registrations er
-                JOIN events e ON er.event_id = e.id
-                WHERE e.date = ?
-            """, (date_filter,)).fetchall()
-            
-            registered_names = {row["player_name"] for row in registered_players}
-            registered_telegram_ids = {row["telegram_id"] for row in registered_players if row["telegram_id"]}
-            
-            # Get rating data and filter
-            all_players = get_rating_data()
-            filtered_players = [
-                p for p in all_players 
-                if p["name"] in registered_names or 
-                   (p.get("telegram_id") and p["telegram_id"] in registered_telegram_ids)
-            ]
-            
-            return jsonify({"ok": True, "players": filtered_players})
+        try:
+            datetime.strptime(date_filter, "%Y-%m-%d")
+        except ValueError:
+            return jsonify({"ok": False, "error": "date must be YYYY-MM-DD"}), 400
+        # Only players registered for events on this date
+        snapshot = rating_snapshot
+        ranked = snapshot["by_name"]
+        hits = [hit for name in get_date_participants(date_filter) for hit in ranked.get(name, ())]
+        hits.sort(key=lambda hit: hit[0])
+        return jsonify({"ok": True, "players": [player for _pos, player in hits]})
     else:
-        return jsonify({"ok": True, "players": get_rating_data()})
+        return app.response_class(rating_snapshot["body"], mimetype="application/json")
+
+
+# Serialized /api/tournament/<id> bodies, shared by every client showing the
+# grid. Writes to scores, bounties or players call invalidate_tournament_bodies().
+tournament_bodies_lock = threading.Lock()
+tournament_bodies = {}  # tournament id -> JSON body
+tournament_bodies_gen = 0  # bumped on every change, guards racing fills
+
+
+def invalidate_tournament_bodies():
+    """Drop every cached grid (a new player shows up in all of them)."""
+    global tournament_bodies_gen
+    with tournament_bodies_lock:
+        tournament_bodies_gen += 1
+        tournament_bodies.clear()
+
+
+def build_tournament_grid(db, tournament_id):
+    """Tournament data with all players and scores, or None if there's no such tournament."""
+    tournament = db.execute(
+        "SELECT * FROM tournaments WHERE id = ?", (tournament_id,)
+    ).fetchone()
+    if not tournament:
+        return None
+    
+    # Calculate days in month
+    number = month_number(tournament["month"])
+    year = tournament["year"]
+    if number and year:
+        days_in_month = calendar.monthrange(year, number)[1]
+    else:
+        # Default to 30 if unknown
+        days_in_month = 30
+    
+    # Get all players
+    players = db.execute("SELECT * FROM players ORDER BY name").fetchall()
+    
+    # Get all scores for this tournament
+    scores = db.execute("""
+        SELECT player_id, game_number, score
+        FROM tournament_results
+        WHERE tournament_id = ?
+    """, (tournament_id,)).fetchall()
+    
+    # Get bounties
+    bounties = db.execute("""
+        SELECT player_id, bounty
+        FROM player_bounties
+        WHERE tournament_id = ?
+    """, (tournament_id,)).fetchall()
+    
+    # Build result structure
+    result = {
+        "tournament": {
+            "id": tournament["id"],
+            "name": tournament["name"],
+            "month": tournament["month"],
+            "year": tournament["year"]
+        },
+        "players": [],
+        "max_games": days_in_month  # Use days in month instead of calculated max
+    }
+    
+    # Group scores and bounties by player in one pass each
+    scores_by_player = {}
+    for score_row in scores:
+        scores_by_player.setdefault(score_row["player_id"], {})[score_row["game_number"]] = score_row["score"]
+    bounty_by_player = {}
+    for bounty_row in bounties:
+        bounty_by_player.setdefault(bounty_row["player_id"], bounty_row["bounty"])
+    
+    # Calculate totals and organize data
+    for player in players:
+        player_scores = scores_by_player.get(player["id"], {})
+        result["players"].append({
+            "id": player["id"],
+            "name": player["name"],
+            "total": sum(player_scores.values()),
+            "bounty": bounty_by_player.get(player["id"], 0),
+            "scores": player_scores
+        })
+    
+    # Sort by total descending
+    result["players"].sort(key=lambda x: -x["total"])
+    
+    return result
 
 
 @app.route("/api/tournament/<int:tournament_id>")
 def api_get_tournament(tournament_id):
     """Get tournament data with all players and scores."""
-    with get_db() as db:
-        tournament = db.execute(
-            "SELECT * FROM tournaments WHERE id = ?", (tournament_id,)
-        ).fetchone()
-        if not tournament:
+    body = tournament_bodies.get(tournament_id)
+    if body is None:
+        gen = tournament_bodies_gen
+        with get_db() as db:
+            result = build_tournament_grid(db, tournament_id)
+        if result is None:
             return jsonify({"ok": False, "error": "Tournament not found"}), 404
-        
-        # Calculate days in month
-        month = tournament["month"]
-        year = tournament["year"]
-        if month == "November" or month == "ноября" or month == "November":
-            days_in_month = 30
-        elif month == "December" or month == "декабря" or month == "December":
-            days_in_month = 31
-        else:
-            # Default to 30 if unknown
-            days_in_month = 30
-        
-        # Get all players
-        players = db.execute("SELECT * FROM players ORDER BY name").fetchall()
-        players_dict = {p["id"]: {"id": p["id"], "name": p["name"]} for p in players}
-        
-        # Get all scores for this tournament
-        scores = db.execute("""
-            SELECT player_id, game_number, score
-            FROM tournament_results
-            WHERE tournament_id = ?
-        """, (tournament_id,)).fetchall()
-        
-        # Get bounties
-        bounties = db.execute("""
-            SELECT player_id, bounty
-            FROM player_bounties
-            WHERE tournament_id = ?
-        """, (tournament_id,)).fetchall()
-        
-        # Build result structure
-        result = {
-            "tournament": {
-                "id": tournament["id"],
-                "name": tournament["name"],
-                "month": tournament["month"],
-                "year": tournament["year"]
-            },
-            "players": [],
-            "max_games": days_in_month  # Use days in month instead of calculated max
-        }
-        
-        # Calculate totals and organize data
-        for player in players:
-            player_scores = {}
-            total = 0
-            for score_row in scores:
-                if score_row["player_id"] == player["id"]:
-                    game_num = score_row["game_number"]
-                    score_val = score_row["score"]
-                    player_scores[game_num] = score_val
-                    total += score_val
-            
-            bounty = 0
-            for bounty_row in bounties:
-                if bounty_row["player_id"] == player["id"]:
-                    bounty = bounty_row["bounty"]
-                    break
-            
-            result["players"].append({
-                "id": player["id"],
-                "name": player["name"],
-                "total": total,
-                "bounty": bounty,
-                "scores": player_scores
-            })
-        
-        # Sort by total descending
-        result["players"].sort(key=lambda x: -x["total"])
-        
-        return jsonify({"ok": True, "data": result})
+        body = app.json.dumps({"ok": True, "data": result})
+        with tournament_bodies_lock:
+            if gen == tournament_bodies_gen:
+                tournament_bodies[tournament_id] = body
+    return app.response_class(body, mimetype="application/json")
 
 
 @app.route("/api/tournaments")
 def api_get_tournaments():
     """Get list of tournaments by month."""
-    month = request.args.get("month")  # "November" or "December"
+    month = request.args.get("month")  # English month name, e.g. "November"
     year = request.args.get("year", type=int)
+    recent = request.args.get("recent", type=int)  # N latest months instead of a month filter
     
-    if not month:
-        return jsonify({"ok": False, "error": "month parameter required"}), 400
+    if not month and not recent:
+        return jsonify({"ok": False, "error": "month or recent parameter required"}), 400
     
     try:
         with get_db() as db:
-            query = "SELECT * FROM tournaments WHERE month = ?"
-            params = [month]
-            
-            if year:
-                query += " AND year = ?"
-                params.append(year)
-            
-            query += " ORDER BY year DESC, id DESC"
-            
-            tournaments = db.execute(query, params).fetchall()
+            if recent:
+                with tournament_cache_lock:
+                    keys = sorted(tournament_cache, reverse=True)[:max(1, min(recent, 36))]
+                    ids = [tournament_cache[key] for key in keys]
+                rows = {t["id"]: t for t in db.execute(
+                    "SELECT * FROM tournaments WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(ids),)
+                ).fetchall()}
+                tournaments = [rows[i] for i in ids if i in rows]
+            else:
+                query = "SELECT * FROM tournaments WHERE month = ?"
+                params = [month]
+                
+                if year:
+                    query += " AND year = ?"
+                    params.append(year)
+                
+                query += " ORDER BY year DESC, id DESC"
+                
+                tournaments = db.execute(query, params).fetchall()
             
             result = []
             for t in tournaments:
@@ -1070,6 +1679,7 @@ def api_get_tournaments():
                     "id": t["id"],
                     "name": t["name"],
                     "month": t["month"],
+                    "month_number": month_number(t["month"]),
                     "year": t["year"]
                 })
             
@@ -1102,7 +1712,8 @@ def api_update_score(tournament_id):
                 VALUES (?, ?, ?, ?)
             """, (tournament_id, player_id, game_number, int(score)))
         
-        socketio.emit("tournament_update", {"tournament_id": tournament_id})
+        invalidate_tournament_bodies()
+        queue_emit("tournament_update", tournament_id, {"tournament_id": tournament_id}, dirty=[int(player_id)])
         return jsonify({"ok": True})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
@@ -1131,12 +1742,84 @@ def api_update_bounty(tournament_id):
                 VALUES (?, ?, ?)
             """, (tournament_id, player_id, int(bounty)))
         
-        socketio.emit("tournament_update", {"tournament_id": tournament_id})
+        invalidate_tournament_bodies()
+        queue_emit("tournament_update", tournament_id, {"tournament_id": tournament_id}, dirty=[int(player_id)])
         return jsonify({"ok": True})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+@app.route("/api/tournament/<int:tournament_id>/scores", methods=["POST"])
+def api_update_scores_bulk(tournament_id):
+    """Update many score and bounty cells in a single transaction."""
+    data = request.get_json() or {}
+    try:
+        require_admin(data)
+    except PermissionError:
+        return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
+
+    score_cells = data.get("scores") or []
+    bounty_cells = data.get("bounties") or []
+    if not isinstance(score_cells, list) or not isinstance(bounty_cells, list):
+        return jsonify({"ok": False, "error": "scores and bounties must be lists"}), 400
+
+    # Validate everything up front so a bad cell doesn't leave a half-saved grid
+    score_rows = []
+    for cell in score_cells:
+        if not isinstance(cell, dict):
+            return jsonify({"ok": False, "error": "invalid score cell"}), 400
+        player_id = cell.get("player_id")
+        game_number = cell.get("game_number")
+        if not player_id or not game_number:
+            return jsonify({"ok": False, "error": "missing parameters"}), 400
+        try:
+            score_rows.append((tournament_id, int(player_id), int(game_number), int(cell.get("score") or 0)))
+        except (ValueError, TypeError):
+            return jsonify({"ok": False, "error": "invalid score cell"}), 400
+
+    bounty_rows = []
+    for cell in bounty_cells:
+        if not isinstance(cell, dict):
+            return jsonify({"ok": False, "error": "invalid bounty cell"}), 400
+        player_id = cell.get("player_id")
+        if not player_id:
+            return jsonify({"ok": False, "error": "missing player_id"}), 400
+        try:
+            bounty_rows.append((tournament_id, int(player_id), int(cell.get("bounty") or 0)))
+        except (ValueError, TypeError):
+            return jsonify({"ok": False, "error": "invalid bounty cell"}), 400
+
+    if not score_rows and not bounty_rows:
+        return jsonify({"ok": True, "scores": 0, "bounties": 0})
+
+    try:
+        with get_db() as db:
+            if score_rows:
+                db.executemany("""
+                    INSERT INTO tournament_results
+                    (tournament_id, player_id, game_number, score)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(tournament_id, player_id, game_number) DO UPDATE SET score = excluded.score
+                """, score_rows)
+            if bounty_rows:
+                db.executemany("""
+                    INSERT INTO player_bounties
+                    (tournament_id, player_id, bounty)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(tournament_id, player_id) DO UPDATE SET bounty = excluded.bounty
+                """, bounty_rows)
+
+        # One notification for the whole grid instead of one per cell
+        dirty = {row[1] for row in score_rows} | {row[1] for row in bounty_rows}
+        invalidate_tournament_bodies()
+        queue_emit("tournament_update", tournament_id, {"tournament_id": tournament_id}, dirty=dirty)
+        # The saved rows, so the editor updates without refetching the grid
+        rows = build_tournament_push(tournament_id, dirty).get("players", [])
+        return jsonify({"ok": True, "scores": len(score_rows), "bounties": len(bounty_rows), "players": rows})
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 @app.route("/api/player", methods=["POST"])
 def api_add_player():
     """Add a new player."""
@@ -1154,6 +1837,7 @@ def api_add_player():
         with get_db() as db:
             cursor = db.execute("INSERT INTO players (name) VALUES (?)", (name,))
             player_id = cursor.lastrowid
+        invalidate_tournament_bodies()
         return jsonify({"ok": True, "player_id": player_id})
     except sqlite3.IntegrityError:
         return jsonify({"ok": False, "error": "player already exists"}), 400
@@ -1161,6 +1845,83 @@ def api_add_player():
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+# Weekly events feed: public event rows with registration counts aggregated
+# in SQL, cached per (start_date, end_date) window. It is the same for every
+# user; is_registered and waitlist_position come from get_user_event_ids()
+# and get_user_waitlist_positions().
+EVENTS_FEED_MAX = 8
+
+events_feed_lock = threading.Lock()
+events_feed = {}  # (start_date, end_date) -> list of event dicts
+events_feed_gen = 0  # bumped on every change, guards racing fills
+
+
+def query_events_feed(db, start_date, end_date):
+    """Events in the window with their registration counts, in one aggregated query."""
+    rows = db.execute("""
+        SELECT e.id, e.date, e.time, e.event_type,
+               COALESCE(e.description, '') as description,
+               COALESCE(e.max_places, 20) as max_places,
+               COALESCE(e.price, 1000) as price,
+               COUNT(r.id) as registration_count
+        FROM events e
+        LEFT JOIN event_registrations r ON r.event_id = e.id
+        WHERE e.date >= ? AND e.date <= ?
+        GROUP BY e.id
+        ORDER BY e.date, e.time
+    """, (start_date, end_date)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_events_feed(start_date, end_date):
+    window = (start_date, end_date)
+    feed = events_feed.get(window)
+    if feed is not None:
+        return feed
+    gen = events_feed_gen
+    with get_db() as db:
+        feed = query_events_feed(db, start_date, end_date)
+    with events_feed_lock:
+        if gen == events_feed_gen:
+            events_feed[window] = feed
+            while len(events_feed) > EVENTS_FEED_MAX:
+                events_feed.pop(next(iter(events_feed)))
+    return feed
+
+
+def invalidate_events_feed(date):
+    """Drop every cached window that contains the date."""
+    global events_feed_gen
+    with events_feed_lock:
+        events_feed_gen += 1
+        for window in [w for w in events_feed if w[0] <= date <= w[1]]:
+            del events_feed[window]
+
+
+def get_user_event_ids(db, telegram_id, start_date, end_date):
+    """Ids of the user's registered events in the window (idx_event_registrations_user)."""
+    rows = db.execute("""
+        SELECT r.event_id
+        FROM event_registrations r
+        JOIN events e ON e.id = r.event_id
+        WHERE r.telegram_id = ? AND e.date >= ? AND e.date <= ?
+    """, (telegram_id, start_date, end_date)).fetchall()
+    return {row["event_id"] for row in rows}
+
+
+def get_user_waitlist_positions(db, telegram_id, start_date, end_date):
+    """{event id: 1-based waitlist position} for the user's waitlisted events in the window."""
+    rows = db.execute("""
+        SELECT w.event_id,
+               (SELECT COUNT(*) FROM event_waitlist ahead
+                WHERE ahead.event_id = w.event_id AND ahead.id <= w.id) as position
+        FROM event_waitlist w
+        JOIN events e ON e.id = w.event_id
+        WHERE w.telegram_id = ? AND e.date >= ? AND e.date <= ?
+    """, (telegram_id, start_date, end_date)).fetchall()
+    return {row["event_id"]: row["position"] for row in rows}
+
+
 @app.route("/api/events", methods=["GET"])
 def api_get_events():
     """Get events for a date range."""
@@ -1172,93 +1933,18 @@ def api_get_events():
         return jsonify({"ok": False, "error": "start_date and end_date required"}), 400
     
     try:
-        with get_db() as db:
-            # First, check if events table exists and has required columns
-            try:
-                # Test query to check table structure
-                db.execute("SELECT 1 FROM events LIMIT 1")
-            except sqlite3.OperationalError as e:
-                print(f"❌ Events table error: {e}")
-                # Try to recreate events table if it doesn't exist
-                init_db()
-            
-            # Simplified query to avoid GROUP BY issues with NULL values
-            events = db.execute("""
-                SELECT e.id, e.date, e.time, e.event_type, e.description, 
-                       COALESCE(e.max_places, 20) as max_places,
-                       COALESCE(e.price, 1000) as price
-                FROM events e
-                WHERE e.date >= ? AND e.date <= ?
-                ORDER BY e.date, e.time
-            """, (start_date, end_date)).fetchall()
-            
-            # Get registrations separately for each event
-            event_ids = [event["id"] for event in events] if events else []
-            registrations = {}
-            if event_ids:
-                placeholders = ",".join("?" * len(event_ids))
-                regs = db.execute(f"""
-                    SELECT event_id, player_name, telegram_username, telegram_id
-                    FROM event_registrations
-                    WHERE event_id IN ({placeholders})
-                """, event_ids).fetchall()
-                for reg in regs:
-                    event_id = reg["event_id"]
-                    if event_id not in registrations:
-                        registrations[event_id] = {"players": [], "usernames": [], "telegram_ids": []}
-                    if reg["player_name"]:
-                        registrations[event_id]["players"].append(reg["player_name"])
-                    if reg["telegram_username"]:
-                        registrations[event_id]["usernames"].append(reg["telegram_username"])
-                    if reg["telegram_id"]:
-                        registrations[event_id]["telegram_ids"].append(reg["telegram_id"])
-            
-            result = []
-            for event in events:
-                event_id = event["id"]
-                reg_data = registrations.get(event_id, {"players": [], "usernames": [], "telegram_ids": []})
-                registered = reg_data["players"]
-                telegram_users = reg_data["usernames"]
-                
-                # Check if current user is registered
-                is_user_registered = False
-                if telegram_id and telegram_id in reg_data["telegram_ids"]:
-                    is_user_registered = True
-                
-                # Get max_places and price, defaulting to 20 and 1000 if None
-                max_places = event.get("max_places")
-                if max_places is None:
-                    max_places = 20
-                else:
-                    try:
-                        max_places = int(max_places)
-                    except (ValueError, TypeError):
-                        max_places = 20
-                
-                price = event.get("price")
-                if price is None:
-                    price = 1000
-                else:
-                    try:
-                        price = int(price)
-                    except (ValueError, TypeError):
-                        price = 1000
-                
-                result.append({
-                    "id": event["id"],
-                    "date": event["date"],
-                    "time": event["time"],
-                    "event_type": event["event_type"],
-                    "description": event["description"] or "",
-                    "max_places": max_places,
-                    "price": price,
-                    "registered": registered,
-                    "telegram_users": telegram_users,
-                    "registration_count": len(registered),
-                    "is_registered": is_user_registered
-                })
-            
-            return jsonify({"ok": True, "events": result})
+        mine, waitlisted = set(), {}
+        if telegram_id:
+            with get_db() as db:
+                mine = get_user_event_ids(db, telegram_id, start_date, end_date)
+                waitlisted = get_user_waitlist_positions(db, telegram_id, start_date, end_date)
+        
+        events = get_events_feed(start_date, end_date)
+        result = [
+            {**event, "is_registered": event["id"] in mine, "waitlist_position": waitlisted.get(event["id"])}
+            for event in events
+        ]
+        return jsonify({"ok": True, "events": result})
     except Exception as e:
         import traceback
         import logging
@@ -1266,6 +1952,34 @@ def api_get_events():
         return jsonify({"ok": False, "error": str(e), "traceback": traceback.format_exc()}), 500
 
 
+@app.route("/api/events/my-registrations", methods=["GET"])
+def api_my_registrations():
+    """Ids of the events in a date range the user is registered for or waitlisted on."""
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    telegram_id = request.args.get("telegram_id", "").strip()
+    
+    if not start_date or not end_date:
+        return jsonify({"ok": False, "error": "start_date and end_date required"}), 400
+    if not telegram_id:
+        return jsonify({"ok": False, "error": "telegram_id required"}), 400
+    
+    try:
+        with get_db() as db:
+            registered = get_user_event_ids(db, telegram_id, start_date, end_date)
+            waitlisted = get_user_waitlist_positions(db, telegram_id, start_date, end_date)
+        return jsonify({
+            "ok": True,
+            "registered": sorted(registered),
+            "waitlisted": sorted(waitlisted),
+        })
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+EVENT_TYPES = ["Мафия", "Покер", "Свободная игра"]
+
+
 @app.route("/api/events", methods=["POST"])
 def api_create_event():
     """Create a new event (admin only)."""
@@ -1285,7 +1999,7 @@ def api_create_event():
     if not date or not time or not event_type:
         return jsonify({"ok": False, "error": "date, time and event_type required"}), 400
     
-    if event_type not in ["Мафия", "Покер", "Свободная игра"]:
+    if event_type not in EVENT_TYPES:
         return jsonify({"ok": False, "error": "invalid event_type"}), 400
     
     try:
@@ -1303,7 +2017,9 @@ def api_create_event():
             """, (date, time, event_type, description, max_places, price))
             event_id = cursor.lastrowid
             db.commit()  # Explicit commit to ensure data is saved
-        socketio.emit("events_update", {"date": date})
+        invalidate_poker_table(date)
+        invalidate_events_feed(date)
+        queue_emit("events_update", date, {"date": date})
         return jsonify({"ok": True, "event_id": event_id})
     except sqlite3.IntegrityError:
         return jsonify({"ok": False, "error": "event already exists"}), 400
@@ -1311,9 +2027,274 @@ def api_create_event():
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+def materialize_event_templates(db, year, month, from_date=None, template_id=None):
+    """Create the month's events from the templates in one transaction.
+
+    With template_id only that template is expanded. Slots that already
+    have an event (UNIQUE(date, time, event_type)) are skipped, so running
+    it twice for a month is a no-op. Returns the dates that got new events
+    and the number of skipped slots.
+    """
+    if template_id is None:
+        rows = db.execute("SELECT * FROM event_templates ORDER BY time").fetchall()
+    else:
+        rows = db.execute("SELECT * FROM event_templates WHERE id = ?", (template_id,)).fetchall()
+    templates = {}
+    for template in rows:
+        templates.setdefault(template["weekday"], []).append(template)
+    
+    created_dates = set()
+    skipped = 0
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        day_date = datetime(year, month, day)
+        date = day_date.strftime("%Y-%m-%d")
+        if from_date and date < from_date:
+            continue
+        for template in templates.get(day_date.weekday(), []):
+            created = db.execute("""
+                INSERT INTO events (date, time, event_type, description, max_places, price)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(date, time, event_type) DO NOTHING
+                RETURNING id
+            """, (date, template["time"], template["event_type"], template["description"],
+                  template["max_places"], template["price"])).fetchone()
+            if created:
+                created_dates.add(date)
+            else:
+                skipped += 1
+    return sorted(created_dates), skipped
+
+
+@app.route("/api/event-templates", methods=["GET"])
+def api_get_event_templates():
+    """List recurring event templates (admin only)."""
+    try:
+        require_admin(request.args)
+    except PermissionError:
+        return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
+    
+    with get_db() as db:
+        templates = db.execute("""
+            SELECT id, weekday, time, event_type, description, max_places, price
+            FROM event_templates
+            ORDER BY weekday, time
+        """).fetchall()
+    return jsonify({"ok": True, "templates": [dict(t) for t in templates]})
+
+
+@app.route("/api/event-templates", methods=["POST"])
+def api_save_event_template():
+    """Create or update the weekly template for a (weekday, time, event_type) slot (admin only)."""
+    data = request.get_json() or {}
+    try:
+        require_admin(data)
+    except PermissionError:
+        return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
+    
+    time = data.get("time", "").strip()
+    event_type = data.get("event_type", "").strip()
+    description = data.get("description", "").strip()
+    try:
+        weekday = int(data.get("weekday"))
+    except (ValueError, TypeError):
+        weekday = -1
+    
+    if not 0 <= weekday <= 6:
+        return jsonify({"ok": False, "error": "weekday must be 0 (Monday) to 6 (Sunday)"}), 400
+    if not time or event_type not in EVENT_TYPES:
+        return jsonify({"ok": False, "error": "time and valid event_type required"}), 400
+    
+    try:
+        max_places = int(data.get("max_places") or 20)
+        price = int(data.get("price") or 1000)
+    except (ValueError, TypeError):
+        max_places = 20
+        price = 1000
+    
+    try:
+        with get_db() as db:
+            template_id = db.execute("""
+                INSERT INTO event_templates (weekday, time, event_type, description, max_places, price)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(weekday, time, event_type) DO UPDATE SET
+                    description = excluded.description,
+                    max_places = excluded.max_places,
+                    price = excluded.price
+                RETURNING id
+            """, (weekday, time, event_type, description, max_places, price)).fetchone()["id"]
+        return jsonify({"ok": True, "template_id": template_id})
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@app.route("/api/event-templates/<int:template_id>", methods=["DELETE"])
+def api_delete_event_template(template_id):
+    """Delete a recurring event template; events already created stay (admin only)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        require_admin(data)
+    except PermissionError:
+        return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
+    
+    with get_db() as db:
+        deleted = db.execute("DELETE FROM event_templates WHERE id = ?", (template_id,)).rowcount
+    if not deleted:
+        return jsonify({"ok": False, "error": "template not found"}), 404
+    return jsonify({"ok": True})
+
+
+@app.route("/api/event-templates/materialize", methods=["POST"])
+def api_materialize_event_templates():
+    """Create a month of events from the templates (admin only).
+
+    Body: year, month, optional from_date (YYYY-MM-DD) to skip earlier days
+    and optional template_id to expand a single template.
+    """
+    data = request.get_json() or {}
+    try:
+        require_admin(data)
+    except PermissionError:
+        return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
+    
+    now = datetime.now()
+    try:
+        year = int(data.get("year") or now.year)
+        month = int(data.get("month") or now.month)
+    except (ValueError, TypeError):
+        return jsonify({"ok": False, "error": "invalid year or month"}), 400
+    if not 1 <= month <= 12:
+        return jsonify({"ok": False, "error": "invalid year or month"}), 400
+    from_date = (data.get("from_date") or "").strip() or None
+    template_id = data.get("template_id")
+    if template_id is not None:
+        try:
+            template_id = int(template_id)
+        except (ValueError, TypeError):
+            return jsonify({"ok": False, "error": "invalid template_id"}), 400
+    
+    try:
+        with get_db() as db:
+            if template_id is not None and not db.execute(
+                "SELECT 1 FROM event_templates WHERE id = ?", (template_id,)
+            ).fetchone():
+                return jsonify({"ok": False, "error": "template not found"}), 404
+            created_dates, skipped = materialize_event_templates(db, year, month, from_date, template_id)
+        
+        for date in created_dates:
+            invalidate_poker_table(date)
+            invalidate_events_feed(date)
+        if created_dates:
+            # One notification for the whole month, so clients refetch once
+            queue_emit("events_update", tuple(created_dates), {"dates": created_dates})
+        return jsonify({"ok": True, "dates": created_dates, "skipped": skipped})
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+# Registration confirmations are sent from a worker thread so a slow
+# Telegram API never holds the registration transaction or the request.
+notification_queue = queue.Queue()
+
+
+def queue_registration_notification(telegram_id, event):
+    """Queue a Telegram confirmation for a registered (or promoted) player."""
+    if TELEGRAM_BOT_AVAILABLE and telegram_id:
+        notification_queue.put((telegram_id, dict(event)))
+
+
+def notification_worker():
+    """Send queued registration confirmations one by one."""
+    while True:
+        telegram_id, event = notification_queue.get()
+        try:
+            send_tournament_registration_confirmation(telegram_id, event)
+        except Exception as e:
+            print(f"❌ Error sending registration confirmation to {telegram_id}: {e}")
+        finally:
+            notification_queue.task_done()
+
+
+# Capacity check evaluated by the INSERT itself, so two concurrent
+# registrations can never both take the last place.
+REGISTER_IF_PLACES_LEFT = """
+    INSERT INTO event_registrations (event_id, player_name, telegram_username, telegram_id)
+    SELECT ?, ?, ?, ?
+    WHERE (SELECT COUNT(*) FROM event_registrations WHERE event_id = ?)
+        < (SELECT COALESCE(max_places, 20) FROM events WHERE id = ?)
+"""
+
+
+def register_or_waitlist(db, event_id, player_name, telegram_username, telegram_id):
+    """Register a player if places are left, otherwise append to the waitlist.
+
+    Must run inside a write transaction (BEGIN IMMEDIATE). Returns None when
+    registered or the 1-based waitlist position otherwise.
+    """
+    cursor = db.execute(REGISTER_IF_PLACES_LEFT, (
+        event_id, player_name, telegram_username, telegram_id, event_id, event_id
+    ))
+    if cursor.rowcount:
+        return None
+    
+    cursor = db.execute("""
+        INSERT INTO event_waitlist (event_id, player_name, telegram_username, telegram_id)
+        VALUES (?, ?, ?, ?)
+    """, (event_id, player_name, telegram_username, telegram_id))
+    return db.execute("""
+        SELECT COUNT(*) as position FROM event_waitlist
+        WHERE event_id = ? AND id <= ?
+    """, (event_id, cursor.lastrowid)).fetchone()["position"]
+
+
+def promote_waitlist(db, event_id):
+    """Move waitlisted players into freed places in FIFO order; returns promoted rows."""
+    promoted = []
+    while True:
+        entry = db.execute("""
+            SELECT id, player_name, telegram_username, telegram_id
+            FROM event_waitlist
+            WHERE event_id = ?
+            ORDER BY id
+            LIMIT 1
+        """, (event_id,)).fetchone()
+        if not entry:
+            break
+        try:
+            cursor = db.execute(REGISTER_IF_PLACES_LEFT, (
+                event_id, entry["player_name"], entry["telegram_username"], entry["telegram_id"],
+                event_id, event_id
+            ))
+        except sqlite3.IntegrityError:
+            # Registered again directly meanwhile; the waitlist entry is stale
+            db.execute("DELETE FROM event_waitlist WHERE id = ?", (entry["id"],))
+            continue
+        if not cursor.rowcount:
+            break
+        db.execute("DELETE FROM event_waitlist WHERE id = ?", (entry["id"],))
+        promoted.append(entry)
+    return promoted
+
+
+# Game nickname: 2-20 chars, letters (lat/cyrillic), numbers, underscore, spaces
+GAME_NICKNAME_RE = re.compile(r'^[a-zA-Zа-яА-ЯёЁ0-9_\s]+$')
+GAME_NICKNAME_BLANK_RE = re.compile(r'^[\s_]+$')
+
+
+def validate_game_nickname(game_nickname):
+    """Return an error message for an invalid (already stripped) nickname, else None."""
+    if len(game_nickname) < 2 or len(game_nickname) > 20:
+        return "game_nickname должен содержать 2-20 символов"
+    if not GAME_NICKNAME_RE.match(game_nickname):
+        return "game_nickname может содержать только буквы (лат/кирилл), цифры, пробелы и _"
+    # Don't allow only spaces
+    if GAME_NICKNAME_BLANK_RE.match(game_nickname):
+        return "game_nickname не может состоять только из пробелов и подчеркиваний"
+    return None
+
+
 @app.route("/api/events/<int:event_id>/register", methods=["POST"])
 def api_register_event(event_id):
-    """Register for an event."""
+    """Register for an event, or join its waitlist when all places are taken."""
     data = request.get_json() or {}
     player_name = data.get("player_name", "").strip()
     telegram_username = data.get("telegram_username", "").strip()
@@ -1325,76 +2306,72 @@ def api_register_event(event_id):
     if not telegram_id:
         return jsonify({"ok": False, "error": "telegram_id required for authorization"}), 400
     
-    # Check if user exists in database (authorization check)
-    try:
-        with get_db() as db:
-            user = db.execute("SELECT telegram_id, offer_accepted, game_nickname FROM telegram_users WHERE telegram_id = ?", (telegram_id,)).fetchone()
-            if not user:
-                return jsonify({"ok": False, "error": "User not authorized. Please register via Telegram bot (/start)"}), 401
-            
-            # Factor 2: offer_accepted
-            if not user.get("offer_accepted"):
-                return jsonify({"ok": False, "error": "offer_not_accepted", "message": "Необходимо принять публичную оферту для записи на события"}), 403
-            
-            # Factor 3: game_nickname
-            if not user.get("game_nickname"):
-                return jsonify({"ok": False, "error": "game_nickname_not_set", "message": "Необходимо указать игровой никнейм для записи на события"}), 403
-    except Exception as e:
-        print(f"Error checking user authorization: {e}")
-        return jsonify({"ok": False, "error": "Authorization check failed"}), 500
-    
     if not player_name:
         return jsonify({"ok": False, "error": "player_name required"}), 400
     
     if not game_nickname:
         return jsonify({"ok": False, "error": "game_nickname required"}), 400
     
-    # Validate game_nickname: 2-20 chars, letters (lat/cyrillic), numbers, underscore, spaces
-    import re
-    # Allow letters (lat/cyrillic), numbers, underscore, and spaces
-    # Trim spaces from start/end, but allow spaces in the middle
-    game_nickname = game_nickname.strip()
-    if len(game_nickname) < 2 or len(game_nickname) > 20:
-        return jsonify({"ok": False, "error": "game_nickname должен содержать 2-20 символов"}), 400
-    if not re.match(r'^[a-zA-Zа-яА-ЯёЁ0-9_\s]+$', game_nickname):
-        return jsonify({"ok": False, "error": "game_nickname может содержать только буквы (лат/кирилл), цифры, пробелы и _"}), 400
-    # Don't allow only spaces
-    if not game_nickname.replace(' ', '').replace('_', ''):
-        return jsonify({"ok": False, "error": "game_nickname не может состоять только из пробелов и подчеркиваний"}), 400
+    error = validate_game_nickname(game_nickname)
+    if error:
+        return jsonify({"ok": False, "error": error}), 400
     
     try:
         with get_db() as db:
-            # All 3 factors (telegram_id, offer_accepted, game_nickname) already checked above
-            # Just verify event exists
+            # One short write transaction: the checks, the capacity count and
+            # the insert below all see the same state
+            db.execute("BEGIN IMMEDIATE")
+            
+            # Authorization check and "already in" flag in one read
+            user = db.execute("""
+                SELECT u.offer_accepted, u.game_nickname,
+                       EXISTS (SELECT 1 FROM event_registrations r
+                               WHERE r.event_id = ? AND r.telegram_id = u.telegram_id)
+                    OR EXISTS (SELECT 1 FROM event_waitlist w
+                               WHERE w.event_id = ? AND w.telegram_id = u.telegram_id) as already
+                FROM telegram_users u
+                WHERE u.telegram_id = ?
+            """, (event_id, event_id, telegram_id)).fetchone()
+            if not user:
+                return jsonify({"ok": False, "error": "User not authorized. Please register via Telegram bot (/start)"}), 401
+            
+            # Factor 2: offer_accepted
+            if not user["offer_accepted"]:
+                return jsonify({"ok": False, "error": "offer_not_accepted", "message": "Необходимо принять публичную оферту для записи на события"}), 403
+            
+            # Factor 3: game_nickname
+            if not user["game_nickname"]:
+                return jsonify({"ok": False, "error": "game_nickname_not_set", "message": "Необходимо указать игровой никнейм для записи на события"}), 403
+            
+            if user["already"]:
+                return jsonify({"ok": False, "error": "already registered"}), 400
+            
             event = db.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
             if not event:
                 return jsonify({"ok": False, "error": "event not found"}), 404
             
-            # Update game_nickname in telegram_users if provided
-            if telegram_id:
+            if game_nickname != user["game_nickname"]:
                 db.execute("""
                     UPDATE telegram_users 
                     SET game_nickname = ?, last_active = CURRENT_TIMESTAMP
                     WHERE telegram_id = ?
                 """, (game_nickname, telegram_id))
-            elif telegram_username:
-                db.execute("""
-                    UPDATE telegram_users 
-                    SET game_nickname = ?, last_active = CURRENT_TIMESTAMP
-                    WHERE username = ?
-                """, (game_nickname, telegram_username))
             
             # Register with game_nickname as player_name
-            db.execute("""
-                INSERT INTO event_registrations (event_id, player_name, telegram_username, telegram_id)
-                VALUES (?, ?, ?, ?)
-            """, (event_id, game_nickname, telegram_username or None, telegram_id or None))
-            
-            # Send confirmation message to user via Telegram bot
-            send_tournament_registration_confirmation(telegram_id, event)
+            position = register_or_waitlist(
+                db, event_id, game_nickname, telegram_username or None, telegram_id
+            )
         
-        socketio.emit("events_update", {"date": event["date"]})
-        return jsonify({"ok": True})
+        if position is not None:
+            return jsonify({"ok": True, "waitlisted": True, "position": position})
+        
+        # Send confirmation message to user via Telegram bot
+        queue_registration_notification(telegram_id, event)
+        add_date_participant(event["date"], game_nickname)
+        invalidate_poker_table(event["date"])
+        invalidate_events_feed(event["date"])
+        queue_emit("events_update", event["date"], {"date": event["date"]})
+        return jsonify({"ok": True, "waitlisted": False})
     except sqlite3.IntegrityError:
         return jsonify({"ok": False, "error": "already registered"}), 400
     except Exception as e:
@@ -1403,7 +2380,7 @@ def api_register_event(event_id):
 
 @app.route("/api/events/<int:event_id>/unregister", methods=["POST"])
 def api_unregister_event(event_id):
-    """Unregister from an event."""
+    """Unregister from an event (or leave its waitlist); frees the place for the waitlist."""
     data = request.get_json() or {}
     telegram_id = data.get("telegram_id", "").strip()
     
@@ -1412,17 +2389,31 @@ def api_unregister_event(event_id):
     
     try:
         with get_db() as db:
+            db.execute("BEGIN IMMEDIATE")
             event = db.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
             if not event:
                 return jsonify({"ok": False, "error": "event not found"}), 404
             
-            db.execute("""
+            cursor = db.execute("""
                 DELETE FROM event_registrations
                 WHERE event_id = ? AND telegram_id = ?
             """, (event_id, telegram_id))
+            if cursor.rowcount:
+                promoted = promote_waitlist(db, event_id)
+            else:
+                db.execute("""
+                    DELETE FROM event_waitlist
+                    WHERE event_id = ? AND telegram_id = ?
+                """, (event_id, telegram_id))
+                promoted = []
         
-        socketio.emit("events_update", {"date": event["date"]})
-        return jsonify({"ok": True})
+        invalidate_date_participants(event["date"])
+        invalidate_poker_table(event["date"])
+        for entry in promoted:
+            queue_registration_notification(entry["telegram_id"], event)
+        invalidate_events_feed(event["date"])
+        queue_emit("events_update", event["date"], {"date": event["date"]})
+        return jsonify({"ok": True, "promoted": [entry["player_name"] for entry in promoted]})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
 
@@ -1486,42 +2477,251 @@ def api_delete_event(event_id):
             
             # Delete event (cascade will delete registrations)
             db.execute("DELETE FROM events WHERE id = ?", (event_id,))
+            db.execute("DELETE FROM event_waitlist WHERE event_id = ?", (event_id,))
         
-        socketio.emit("events_update", {"date": event["date"]})
+        invalidate_date_participants(event["date"])
+        invalidate_poker_table(event["date"])
+        invalidate_events_feed(event["date"])
+        queue_emit("events_update", event["date"], {"date": event["date"]})
         return jsonify({"ok": True, "message": "Event deleted"})
     except Exception as e:
         import traceback
         return jsonify({"ok": False, "error": str(e), "traceback": traceback.format_exc()}), 500
 
 
-@app.route("/api/poker-tournament/<date>")
-def api_get_poker_tournament(date):
-    """Get poker tournament players for a specific date (admin only)."""
-    # Check admin token
-    token = request.args.get("token") or (request.get_json() or {}).get("token", "")
-    telegram_username = request.args.get("telegram_username") or (request.get_json() or {}).get("telegram_username", "")
+# Fold of each poker action into tournament_player_states: values for a new
+# row (has_rent, is_eliminated, reentry_count, addon_count, bonus_points)
+# and the update applied to an existing one. +100 bonus for rent, reentry, addon.
+POKER_ACTIONS = {
+    "rent": ((1, 0, 0, 0, 100), "has_rent = 1, bonus_points = bonus_points + 100"),
+    "eliminate": ((0, 1, 0, 0, 0), "is_eliminated = 1"),
+    "reentry": ((0, 0, 1, 0, 100), "reentry_count = reentry_count + 1, bonus_points = bonus_points + 100, is_eliminated = 0"),
+    "addon": ((0, 0, 0, 1, 100), "addon_count = addon_count + 1, bonus_points = bonus_points + 100"),
+    "finalize": ((0, 0, 0, 0, 0), "final_place = excluded.final_place"),
+}
+
+
+POKER_STATE_COLUMNS = "has_rent, is_eliminated, reentry_count, addon_count, final_place, bonus_points"
+
+
+def apply_poker_action(db, event_id, player_name, action, place=None):
+    """Fold one action into the player's state with a single UPSERT. Returns the new state row."""
+    values, update = POKER_ACTIONS[action]
+    return db.execute(f"""
+        INSERT INTO tournament_player_states
+        (event_id, player_name, has_rent, is_eliminated, reentry_count, addon_count, bonus_points, final_place)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(event_id, player_name) DO UPDATE SET {update}, updated_at = CURRENT_TIMESTAMP
+        RETURNING {POKER_STATE_COLUMNS}
+    """, (event_id, player_name, *values, place if action == "finalize" else None)).fetchone()
+
+
+def record_poker_action(db, event_id, player_name, action, place=None):
+    """Append an action to the log and fold it. Returns (action id, new state row)."""
+    cursor = db.execute("""
+        INSERT INTO poker_actions (event_id, player_name, action, place)
+        VALUES (?, ?, ?, ?)
+    """, (event_id, player_name, action, place))
+    state_row = apply_poker_action(db, event_id, player_name, action, place)
+    return cursor.lastrowid, state_row
+
+
+def rebuild_poker_player_state(db, event_id, player_name):
+    """Recompute one player's state from their live (not undone) actions.
+
+    Returns the new state row, or None when no actions are left.
+    """
+    db.execute("DELETE FROM tournament_player_states WHERE event_id = ? AND player_name = ?", (event_id, player_name))
+    actions = db.execute("""
+        SELECT action, place FROM poker_actions
+        WHERE event_id = ? AND player_name = ? AND undone = 0 AND action != 'undo'
+        ORDER BY id
+    """, (event_id, player_name)).fetchall()
+    state_row = None
+    for row in actions:
+        state_row = apply_poker_action(db, event_id, player_name, row["action"], row["place"])
+    return state_row
+
+
+def undo_poker_action(db, event_id, player_name, action_id=None):
+    """Undo the player's latest action (or a given one).
+
+    Returns (undone action id, new state row), or (None, None) when there is nothing to undo.
+    """
+    if action_id:
+        target = db.execute("""
+            SELECT id FROM poker_actions
+            WHERE id = ? AND event_id = ? AND player_name = ? AND undone = 0 AND action != 'undo'
+        """, (action_id, event_id, player_name)).fetchone()
+    else:
+        target = db.execute("""
+            SELECT id FROM poker_actions
+            WHERE event_id = ? AND player_name = ? AND undone = 0 AND action != 'undo'
+            ORDER BY id DESC LIMIT 1
+        """, (event_id, player_name)).fetchone()
+    if not target:
+        return None, None
+    
+    db.execute("UPDATE poker_actions SET undone = 1 WHERE id = ?", (target["id"],))
+    db.execute("""
+        INSERT INTO poker_actions (event_id, player_name, action, undo_of)
+        VALUES (?, ?, 'undo', ?)
+    """, (event_id, player_name, target["id"]))
+    return target["id"], rebuild_poker_player_state(db, event_id, player_name)
+
+
+def replay_poker_actions(db, event_id=None):
+    """Rebuild tournament_player_states from the log (one event or all). Returns actions applied."""
+    if event_id:
+        event_ids = [event_id]
+    else:
+        event_ids = [r["event_id"] for r in db.execute("SELECT DISTINCT event_id FROM poker_actions").fetchall()]
+    
+    applied = 0
+    for eid in event_ids:
+        db.execute("DELETE FROM tournament_player_states WHERE event_id = ?", (eid,))
+        actions = db.execute("""
+            SELECT player_name, action, place FROM poker_actions
+            WHERE event_id = ? AND undone = 0 AND action != 'undo'
+            ORDER BY id
+        """, (eid,)).fetchall()
+        for row in actions:
+            apply_poker_action(db, eid, row["player_name"], row["action"], row["place"])
+            applied += 1
+    return applied
+
+
+def backfill_poker_actions(db):
+    """Write log entries that fold into each existing state (for states older than the log).
+
+    The old rent handler added 100 bonus points on every click, so a rented
+    player gets one extra "rent" entry per 100 points above
+    100 * (rent + reentries + addons). States whose bonus can't be rebuilt
+    that way are left without entries and reported.
+    """
+    states = db.execute("""
+        SELECT event_id, player_name, has_rent, is_eliminated, reentry_count, addon_count,
+               final_place, bonus_points
+        FROM tournament_player_states
+        ORDER BY id
+    """).fetchall()
+    rows = []
+    for st in states:
+        key = (st["event_id"], st["player_name"])
+        reentries = st["reentry_count"] or 0
+        addons = st["addon_count"] or 0
+        extra = (st["bonus_points"] or 0) - 100 * ((1 if st["has_rent"] else 0) + reentries + addons)
+        if extra < 0 or extra % 100 or (extra and not st["has_rent"]):
+            print(f"⚠️ Poker log backfill: skipping {st['player_name']!r} in event {st['event_id']}, "
+                  f"bonus_points {st['bonus_points']} doesn't match its actions")
+            continue
+        if st["has_rent"]:
+            rows.extend([(*key, "rent", None)] * (1 + extra // 100))
+        rows.extend([(*key, "reentry", None)] * reentries)
+        rows.extend([(*key, "addon", None)] * addons)
+        if st["is_eliminated"]:
+            rows.append((*key, "eliminate", None))
+        if st["final_place"] is not None:
+            rows.append((*key, "finalize", st["final_place"]))
+    if rows:
+        db.executemany("""
+            INSERT INTO poker_actions (event_id, player_name, action, place)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+
+
+def parse_poker_action(entry):
+    """Validate one {player_name, event_id, action, place, action_id} entry.
+
+    Returns (player_name, event_id, action, place, action_id) or raises ValueError.
+    """
+    player_name = ((entry or {}).get("player_name") or "").strip()
+    event_id = (entry or {}).get("event_id")
+    action = (entry or {}).get("action")  # "rent", "eliminate", "reentry", "addon", "finalize", "undo"
+    place = (entry or {}).get("place")
+    action_id = (entry or {}).get("action_id")
+    
+    if not player_name or not event_id or not action:
+        raise ValueError("player_name, event_id and action required")
+    if action not in POKER_ACTIONS and action != "undo":
+        raise ValueError("unknown action")
+    
+    # Convert event_id to int if it's a string
     try:
-        require_admin({"token": token, "telegram_username": telegram_username})
-    except PermissionError:
-        return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
+        event_id = int(event_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid event_id")
+    
+    # Convert place to int if provided
+    if place is not None:
+        try:
+            place = int(place)
+        except (ValueError, TypeError):
+            place = None
+    if action == "finalize" and not place:
+        raise ValueError("place required for finalize")
     
     try:
-        with get_db() as db:
-            # Get all poker events for this date
-            events = db.execute("""
-                SELECT id, time, description
-                FROM events
-                WHERE date = ? AND event_type = 'Покер'
-                ORDER BY time
-            """, (date,)).fetchall()
-            
-            if not events:
-                return jsonify({"ok": True, "events": [], "players": []})
-            
-            # Get all registered players for these events
-            event_ids = [e["id"] for e in events]
+        action_id = int(action_id) if action_id else None
+    except (ValueError, TypeError):
+        raise ValueError("invalid action_id")
+    
+    return player_name, event_id, action, place, action_id
+
+
+# Live poker tables: date -> immutable model of that night's events, players
+# and states. Loaded from SQLite on first read, updated write-through by
+# player actions and swapped as a whole, so reads need no lock or query.
+# Registration changes drop the date's model; SQLite stays the durable store.
+POKER_TABLES_MAX = 4
+poker_tables_lock = threading.Lock()
+poker_tables = {}
+poker_table_version = 0
+
+# A date's DB writes, loads and write-throughs run under its stripe of
+# these locks, so the cached model applies them in commit order.
+POKER_WRITE_LOCKS = tuple(threading.Lock() for _ in range(16))
+
+
+def poker_write_lock(date):
+    return POKER_WRITE_LOCKS[hash(date) % len(POKER_WRITE_LOCKS)]
+
+
+def player_state_fields(state_row):
+    """API fields of a tournament_player_states row (defaults when there is none)."""
+    if not state_row:
+        return {"has_rent": False, "is_eliminated": False, "reentry_count": 0,
+                "addon_count": 0, "final_place": None, "bonus_points": 0}
+    return {
+        "has_rent": bool(state_row["has_rent"]),
+        "is_eliminated": bool(state_row["is_eliminated"]),
+        "reentry_count": state_row["reentry_count"] or 0,
+        "addon_count": state_row["addon_count"] or 0,
+        "final_place": state_row["final_place"],
+        "bonus_points": state_row["bonus_points"] or 0,
+    }
+
+
+def next_poker_table_version():
+    global poker_table_version
+    poker_table_version += 1
+    return poker_table_version
+
+
+def load_poker_table(date):
+    """Build the date's model from SQLite (three queries) and cache it."""
+    with get_db() as db:
+        events = db.execute("""
+            SELECT id, time, description
+            FROM events
+            WHERE date = ? AND event_type = 'Покер'
+            ORDER BY time
+        """, (date,)).fetchall()
+        event_ids = [e["id"] for e in events]
+        registrations = []
+        states = []
+        if event_ids:
             placeholders = ",".join("?" * len(event_ids))
-            
             registrations = db.execute(f"""
                 SELECT DISTINCT er.player_name, er.telegram_id, er.event_id, e.time as event_time
                 FROM event_registrations er
@@ -1529,38 +2729,96 @@ def api_get_poker_tournament(date):
                 WHERE er.event_id IN ({placeholders})
                 ORDER BY er.player_name
             """, event_ids).fetchall()
-            
-            # Get player states
             states = db.execute(f"""
-                SELECT player_name, has_rent, is_eliminated, reentry_count, addon_count, final_place, bonus_points
+                SELECT event_id, player_name, {POKER_STATE_COLUMNS}
                 FROM tournament_player_states
                 WHERE event_id IN ({placeholders})
             """, event_ids).fetchall()
-            
-            states_dict = {s["player_name"]: s for s in states}
-            
-            players = []
-            for reg in registrations:
-                player_name = reg["player_name"]
-                state = states_dict.get(player_name, {})
-                players.append({
-                    "name": player_name,
-                    "telegram_id": reg["telegram_id"],
-                    "event_id": reg["event_id"],
-                    "event_time": reg["event_time"],
-                    "has_rent": bool(state.get("has_rent", False)),
-                    "is_eliminated": bool(state.get("is_eliminated", False)),
-                    "reentry_count": state.get("reentry_count", 0) or 0,
-                    "addon_count": state.get("addon_count", 0) or 0,
-                    "final_place": state.get("final_place"),
-                    "bonus_points": state.get("bonus_points", 0) or 0
-                })
-            
-            return jsonify({
-                "ok": True,
-                "events": [{"id": e["id"], "time": e["time"], "description": e["description"]} for e in events],
-                "players": players
-            })
+    
+    states_dict = {(s["event_id"], s["player_name"]): s for s in states}
+    players = tuple(
+        {
+            "name": reg["player_name"],
+            "telegram_id": reg["telegram_id"],
+            "event_id": reg["event_id"],
+            "event_time": reg["event_time"],
+            **player_state_fields(states_dict.get((reg["event_id"], reg["player_name"]))),
+        }
+        for reg in registrations
+    )
+    
+    with poker_tables_lock:
+        model = {
+            "version": next_poker_table_version(),
+            "events": tuple({"id": e["id"], "time": e["time"], "description": e["description"]} for e in events),
+            "players": players,
+        }
+        poker_tables[date] = model
+        while len(poker_tables) > POKER_TABLES_MAX:
+            poker_tables.pop(next(iter(poker_tables)))
+    return model
+
+
+def get_poker_table(date):
+    model = poker_tables.get(date)
+    if model:
+        return model
+    with poker_write_lock(date):
+        return poker_tables.get(date) or load_poker_table(date)
+
+
+def update_poker_table_player(date, event_id, player_name, state_row):
+    """Write-through of one player's new state into the cached model. Returns the player or None.
+
+    Call under poker_write_lock(date), taken before the DB write.
+    """
+    with poker_tables_lock:
+        model = poker_tables.get(date)
+        if not model:
+            return None
+        updated = None
+        players = []
+        for player in model["players"]:
+            if player["event_id"] == event_id and player["name"] == player_name:
+                player = {**player, **player_state_fields(state_row)}
+                updated = player
+            players.append(player)
+        if updated is None:
+            return None
+        poker_tables[date] = {**model, "version": next_poker_table_version(), "players": tuple(players)}
+    return updated
+
+
+def invalidate_poker_table(date):
+    # Waits for a load in progress, which may have read the old rows
+    with poker_write_lock(date), poker_tables_lock:
+        poker_tables.pop(date, None)
+
+
+@app.route("/api/poker-tournament/<date>")
+def api_get_poker_tournament(date):
+    """Get poker tournament players for a specific date (admin only)."""
+    # Check admin token
+    token = request.args.get("token") or (request.get_json(silent=True) or {}).get("token", "")
+    telegram_username = request.args.get("telegram_username") or (request.get_json(silent=True) or {}).get("telegram_username", "")
+    try:
+        require_admin({"token": token, "telegram_username": telegram_username})
+    except PermissionError:
+        return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
+    
+    try:
+        model = get_poker_table(date)
+        # Clients pass the version they have to skip unchanged payloads
+        since = request.args.get("since", type=int)
+        if since is not None and since == model["version"]:
+            return jsonify({"ok": True, "unchanged": True, "version": model["version"]})
+        
+        return jsonify({
+            "ok": True,
+            "version": model["version"],
+            "events": model["events"],
+            "players": model["players"]
+        })
     except Exception as e:
         import traceback
         return jsonify({"ok": False, "error": str(e), "traceback": traceback.format_exc()}), 500
@@ -1568,130 +2826,152 @@ def api_get_poker_tournament(date):
 
 @app.route("/api/poker-tournament/<date>/player", methods=["POST"])
 def api_update_poker_player(date):
-    """Update poker tournament player state (rent, elimination, reentry, addon)."""
+    """Update poker tournament player state (rent, elimination, reentry, addon, undo)."""
     data = request.get_json() or {}
     try:
         require_admin(data)
     except PermissionError:
         return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
     
-    player_name = data.get("player_name", "").strip()
-    event_id = data.get("event_id")
-    action = data.get("action")  # "rent", "eliminate", "reentry", "addon", "finalize"
-    place = data.get("place")
-    
-    if not player_name or not event_id or not action:
-        return jsonify({"ok": False, "error": "player_name, event_id and action required"}), 400
+    try:
+        player_name, event_id, action, place, action_id = parse_poker_action(data)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
     
-    # Convert event_id to int if it's a string
     try:
-        event_id = int(event_id)
-    except (ValueError, TypeError):
-        return jsonify({"ok": False, "error": "invalid event_id"}), 400
+        with poker_write_lock(date):
+            with get_db() as db:
+                # Check if event is poker
+                event = db.execute("SELECT id, event_type, date FROM events WHERE id = ?", (event_id,)).fetchone()
+                if not event or event["event_type"] != "Покер":
+                    return jsonify({"ok": False, "error": "event is not a poker tournament"}), 400
+                if event["date"] != date:
+                    return jsonify({"ok": False, "error": f"event is not on {date}"}), 400
+                
+                if action == "undo":
+                    undone, state_row = undo_poker_action(db, event_id, player_name, action_id)
+                    if not undone:
+                        return jsonify({"ok": False, "error": "nothing to undo"}), 400
+                    result = {"ok": True, "undone": undone}
+                else:
+                    new_id, state_row = record_poker_action(db, event_id, player_name, action, place)
+                    result = {"ok": True, "action_id": new_id}
+            
+            # Committed; update the live table
+            player = update_poker_table_player(date, event_id, player_name, state_row)
+            model = poker_tables.get(date)
+        result["player"] = player
+        result["version"] = model["version"] if model else None
+        return jsonify(result)
+    except Exception as e:
+        import traceback
+        return jsonify({"ok": False, "error": str(e), "traceback": traceback.format_exc()}), 500
+
+
+@app.route("/api/poker-tournament/<date>/actions", methods=["POST"])
+def api_poker_actions_batch(date):
+    """Apply a batch of player actions (including undo) in one transaction."""
+    data = request.get_json() or {}
+    try:
+        require_admin(data)
+    except PermissionError:
+        return jsonify({"ok": False, "error": "invalid token or not admin"}), 403
     
-    # Convert place to int if provided
-    if place is not None:
+    entries = data.get("actions")
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"ok": False, "error": "actions list required"}), 400
+    
+    parsed = []
+    for idx, entry in enumerate(entries):
+        # A batch-level event_id applies to entries that don't carry their own
+        if isinstance(entry, dict) and not entry.get("event_id") and data.get("event_id"):
+            entry = {**entry, "event_id": data.get("event_id")}
         try:
-            place = int(place)
-        except (ValueError, TypeError):
-            place = None
+            parsed.append(parse_poker_action(entry))
+        except ValueError as e:
+            return jsonify({"ok": False, "error": f"action {idx}: {e}"}), 400
     
     try:
-        with get_db() as db:
-            # Check if event is poker
-            event = db.execute("SELECT id, event_type FROM events WHERE id = ?", (event_id,)).fetchone()
-            if not event or event["event_type"] != "Покер":
-                return jsonify({"ok": False, "error": "event is not a poker tournament"}), 400
-            
-            # Get or create player state
-            state = db.execute("""
-                SELECT * FROM tournament_player_states
-                WHERE event_id = ? AND player_name = ?
-            """, (event_id, player_name)).fetchone()
-            
-            if action == "rent":
-                if state:
-                    db.execute("""
-                        UPDATE tournament_player_states
-                        SET has_rent = 1, bonus_points = bonus_points + 100, updated_at = CURRENT_TIMESTAMP
-                        WHERE event_id = ? AND player_name = ?
-                    """, (event_id, player_name))
-                else:
-                    db.execute("""
-                        INSERT INTO tournament_player_states
-                        (event_id, player_name, has_rent, bonus_points)
-                        VALUES (?, ?, 1, 100)
-                    """, (event_id, player_name))
-            
-            elif action == "eliminate":
-                if state:
-                    db.execute("""
-                        UPDATE tournament_player_states
-                        SET is_eliminated = 1, updated_at = CURRENT_TIMESTAMP
-                        WHERE event_id = ? AND player_name = ?
-                    """, (event_id, player_name))
-                else:
-                    db.execute("""
-                        INSERT INTO tournament_player_states
-                        (event_id, player_name, is_eliminated)
-                        VALUES (?, ?, 1)
-                    """, (event_id, player_name))
-            
-            elif action == "reentry":
-                if state:
-                    db.execute("""
-                        UPDATE tournament_player_states
-                        SET reentry_count = reentry_count + 1,
-                            bonus_points = bonus_points + 100,
-                            is_eliminated = 0,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE event_id = ? AND player_name = ?
-                    """, (event_id, player_name))
-                else:
-                    db.execute("""
-                        INSERT INTO tournament_player_states
-                        (event_id, player_name, reentry_count, bonus_points, is_eliminated)
-                        VALUES (?, ?, 1, 100, 0)
-                    """, (event_id, player_name))
-            
-            elif action == "addon":
-                if state:
-                    db.execute("""
-                        UPDATE tournament_player_states
-                        SET addon_count = addon_count + 1,
-                            bonus_points = bonus_points + 100,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE event_id = ? AND player_name = ?
-                    """, (event_id, player_name))
-                else:
-                    db.execute("""
-                        INSERT INTO tournament_player_states
-                        (event_id, player_name, addon_count, bonus_points)
-                        VALUES (?, ?, 1, 100)
-                    """, (event_id, player_name))
-            
-            elif action == "finalize":
-                if not place:
-                    return jsonify({"ok": False, "error": "place required for finalize"}), 400
-                if state:
-                    db.execute("""
-                        UPDATE tournament_player_states
-                        SET final_place = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE event_id = ? AND player_name = ?
-                    """, (place, event_id, player_name))
-                else:
-                    db.execute("""
-                        INSERT INTO tournament_player_states
-                        (event_id, player_name, final_place)
-                        VALUES (?, ?, ?)
-                    """, (event_id, player_name, place))
+        with poker_write_lock(date):
+            with get_db() as db:
+                event_ids = sorted({p[1] for p in parsed})
+                event_dates = {r["id"]: r["date"] for r in db.execute("""
+                    SELECT id, date FROM events
+                    WHERE event_type = 'Покер' AND id IN (SELECT value FROM json_each(?))
+                """, (json.dumps(event_ids),)).fetchall()}
+                if len(event_dates) != len(event_ids):
+                    return jsonify({"ok": False, "error": "event is not a poker tournament"}), 400
+                for idx, (_name, event_id, _action, _place, _action_id) in enumerate(parsed):
+                    if event_dates[event_id] != date:
+                        return jsonify({"ok": False, "error": f"action {idx}: event is not on {date}"}), 400
+                
+                results = []
+                new_states = {}
+                for player_name, event_id, action, place, action_id in parsed:
+                    if action == "undo":
+                        undone, state_row = undo_poker_action(db, event_id, player_name, action_id)
+                        results.append({"undone": undone})
+                        if not undone:
+                            continue
+                    else:
+                        new_id, state_row = record_poker_action(db, event_id, player_name, action, place)
+                        results.append({"action_id": new_id})
+                    new_states[(event_id, player_name)] = state_row
             
-            return jsonify({"ok": True})
+            # Committed; update the live table with each player's final state
+            for (event_id, player_name), state_row in new_states.items():
+                update_poker_table_player(date, event_id, player_name, state_row)
+            model = poker_tables.get(date)
+        return jsonify({"ok": True, "results": results, "version": model["version"] if model else None})
     except Exception as e:
         import traceback
         return jsonify({"ok": False, "error": str(e), "traceback": traceback.format_exc()}), 500
 
 
+def resolve_player_ids(db, entries):
+    """Get or create players for (name, telegram_id) pairs in a few set-based statements.
+
+    Players with a telegram_id are matched by it (and renamed to the current
+    nickname); the rest are matched by name among players without one.
+    Returns {(name, telegram_id): player_id}.
+    """
+    with_tg = {(name, tg) for name, tg in entries if tg}
+    without_tg = {name for name, tg in entries if not tg}
+    resolved = {}
+    
+    if with_tg:
+        db.executemany("""
+            INSERT INTO players (name, telegram_id) VALUES (?, ?)
+            ON CONFLICT(telegram_id) DO UPDATE SET name = excluded.name
+        """, sorted(with_tg))
+        rows = db.execute("""
+            SELECT id, telegram_id FROM players
+            WHERE telegram_id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(sorted(tg for _name, tg in with_tg)),)).fetchall()
+        ids_by_tg = {r["telegram_id"]: r["id"] for r in rows}
+        for name, tg in with_tg:
+            resolved[(name, tg)] = ids_by_tg[tg]
+    
+    if without_tg:
+        names_json = json.dumps(sorted(without_tg))
+        existing = {r["name"] for r in db.execute("""
+            SELECT name FROM players
+            WHERE telegram_id IS NULL AND name IN (SELECT value FROM json_each(?))
+        """, (names_json,)).fetchall()}
+        missing = sorted(without_tg - existing)
+        if missing:
+            db.executemany("INSERT INTO players (name) VALUES (?)", [(name,) for name in missing])
+        rows = db.execute("""
+            SELECT name, MIN(id) as id FROM players
+            WHERE telegram_id IS NULL AND name IN (SELECT value FROM json_each(?))
+            GROUP BY name
+        """, (names_json,)).fetchall()
+        for r in rows:
+            resolved[(r["name"], None)] = r["id"]
+    
+    return resolved
+
+
 @app.route("/api/poker-tournament/<date>/finalize", methods=["POST"])
 def api_finalize_poker_tournament(date):
     """Finalize poker tournament and calculate points based on places."""
@@ -1712,12 +2992,16 @@ def api_finalize_poker_tournament(date):
     
     try:
         with get_db() as db:
-            # Get all players with final places
+            # Players with final places, with their telegram_id from the registrations
             players = db.execute("""
-                SELECT player_name, final_place, bonus_points
-                FROM tournament_player_states
-                WHERE event_id = ? AND final_place IS NOT NULL
-                ORDER BY final_place
+                SELECT s.player_name, s.final_place, s.bonus_points,
+                       (SELECT er.telegram_id FROM event_registrations er
+                        WHERE er.event_id = s.event_id AND er.player_name = s.player_name
+                          AND er.telegram_id IS NOT NULL
+                        LIMIT 1) as telegram_id
+                FROM tournament_player_states s
+                WHERE s.event_id = ? AND s.final_place IS NOT NULL
+                ORDER BY s.final_place
             """, (event_id,)).fetchall()
             
             if not players:
@@ -1729,71 +3013,28 @@ def api_finalize_poker_tournament(date):
                 return jsonify({"ok": False, "error": "Event not found"}), 404
             
             event_date = datetime.strptime(event["date"], "%Y-%m-%d")
-            month_name = "November" if event_date.month == 11 else "December"
-            year = event_date.year
-            
-            tournament = db.execute("""
-                SELECT id FROM tournaments WHERE month = ? AND year = ?
-            """, (month_name, year)).fetchone()
-            
-            if not tournament:
-                return jsonify({"ok": False, "error": "Tournament not found for this month"}), 404
-            
-            tournament_id = tournament["id"]
+            tournament_id = resolve_tournament(db, event_date.year, event_date.month)
             day_number = event_date.day
             
-            # Calculate and save points
-            for player in players:
-                place = player["final_place"]
-                bonus_points = player["bonus_points"] or 0
-                place_points = PLACE_POINTS.get(place, 0)
-                # Bonus points (+100 for rent, reentry, addon) are added to place points
-                total_points = place_points + bonus_points
-                
-                # Get or create player in players table using telegram_id
-                # First try to get telegram_id from event_registrations
-                telegram_id = None
-                if player.get("telegram_id"):
-                    telegram_id = player["telegram_id"]
-                else:
-                    # Try to get telegram_id from event_registrations by player_name
-                    reg = db.execute("""
-                        SELECT telegram_id FROM event_registrations 
-                        WHERE event_id = ? AND player_name = ? AND telegram_id IS NOT NULL
-                        LIMIT 1
-                    """, (event_id, player["player_name"])).fetchone()
-                    if reg and reg["telegram_id"]:
-                        telegram_id = reg["telegram_id"]
-                
-                # Get or create player by telegram_id (primary) or name (fallback)
-                if telegram_id:
-                    player_row = db.execute("SELECT id FROM players WHERE telegram_id = ?", (telegram_id,)).fetchone()
-                    if not player_row:
-                        # Create new player with telegram_id
-                        cursor = db.execute("INSERT INTO players (name, telegram_id) VALUES (?, ?)", (player["player_name"], telegram_id))
-                        player_id = cursor.lastrowid
-                    else:
-                        player_id = player_row["id"]
-                        # Update name if changed
-                        db.execute("UPDATE players SET name = ? WHERE id = ?", (player["player_name"], player_id))
-                else:
-                    # Fallback: use name if telegram_id not available
-                    player_row = db.execute("SELECT id FROM players WHERE name = ? AND telegram_id IS NULL", (player["player_name"],)).fetchone()
-                    if not player_row:
-                        cursor = db.execute("INSERT INTO players (name) VALUES (?)", (player["player_name"],))
-                        player_id = cursor.lastrowid
-                    else:
-                        player_id = player_row["id"]
-                
-                # Save points to tournament_results
-                db.execute("""
-                    INSERT OR REPLACE INTO tournament_results
-                    (tournament_id, player_id, game_number, score)
-                    VALUES (?, ?, ?, ?)
-                """, (tournament_id, player_id, day_number, total_points))
+            player_ids = resolve_player_ids(db, [(p["player_name"], p["telegram_id"]) for p in players])
             
-            socketio.emit("tournament_update", {"tournament_id": tournament_id})
-            return jsonify({"ok": True, "message": "Tournament finalized"})
+            # Bonus points (+100 for rent, reentry, addon) are added to place points
+            result_rows = [
+                (tournament_id, player_ids[(p["player_name"], p["telegram_id"])], day_number,
+                 PLACE_POINTS.get(p["final_place"], 0) + (p["bonus_points"] or 0))
+                for p in players
+            ]
+            db.executemany("""
+                INSERT INTO tournament_results
+                (tournament_id, player_id, game_number, score)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(tournament_id, player_id, game_number) DO UPDATE SET score = excluded.score
+            """, result_rows)
+            finalized_ids = {row[1] for row in result_rows}
+        
+        invalidate_tournament_bodies()
+        queue_emit("tournament_update", tournament_id, {"tournament_id": tournament_id}, dirty=finalized_ids)
+        return jsonify({"ok": True, "message": "Tournament finalized"})
     except Exception as e:
         import traceback
         return jsonify({"ok": False, "error": str(e), "traceback": traceback.format_exc()}), 500
@@ -1826,31 +3067,123 @@ def calculate_points(place: int) -> int:
         return 20  # For places 16+
 
 
+# Writers (set_players) are serialized by players_lock; readers take the
+# current snapshot reference without locking. A snapshot is never mutated,
+# a new one is built and swapped in on every update.
 players_lock = threading.Lock()
-players = []  # List of {"name": str, "place": int, "points": int}
+rating_snapshot = {"players": (), "by_name": {}, "body": '{"ok":true,"players":[]}'}
+
+
+def build_rating_snapshot(rows):
+    """Build an immutable rating snapshot with its /api/rating body pre-serialized."""
+    players = tuple({"name": name, "place": place, "points": points} for name, place, points in rows)
+    # name -> [(position, player), ...] for date-filtered lookups; a name
+    # listed twice keeps both rows
+    by_name = {}
+    for pos, player in enumerate(players):
+        by_name.setdefault(player["name"], []).append((pos, player))
+    return {
+        "players": players,
+        "by_name": by_name,
+        "body": app.json.dumps({"ok": True, "players": players}),
+    }
+
+
+def rating_rows(player_list):
+    """(name, place, points) rows for names listed in place order."""
+    rows = []
+    for idx, name in enumerate(player_list, start=1):
+        if name.strip():
+            rows.append((name.strip(), idx, calculate_points(idx)))
+    # Sort by points descending, then by place ascending
+    rows.sort(key=lambda x: (-x[2], x[1]))
+    return rows
 
 
 def update_players_from_list(player_list: list):
     """Update players from a list of names with their places."""
-    global players
+    global rating_snapshot
     with players_lock:
-        players = []
-        for idx, name in enumerate(player_list, start=1):
-            if name.strip():
-                points = calculate_points(idx)
-                players.append({
-                    "name": name.strip(),
-                    "place": idx,
-                    "points": points
-                })
-        # Sort by points descending, then by place ascending
-        players.sort(key=lambda x: (-x["points"], x["place"]))
+        rows = rating_rows(player_list)
+
+        with get_db() as db:
+            db.execute("DELETE FROM rating_players")
+            db.executemany("""
+                INSERT INTO rating_players (name, place, points)
+                VALUES (?, ?, ?)
+            """, rows)
 
+        rating_snapshot = build_rating_snapshot(rows)
+    queue_emit("rating_update", None, {"players": rating_snapshot["players"]})
 
-def get_rating_data():
-    """Get current rating data sorted by points."""
+
+def load_rating_from_db():
+    """Load the persisted rating into the snapshot. Returns the player count."""
+    global rating_snapshot
+    with get_db() as db:
+        rows = db.execute("""
+            SELECT name, place, points FROM rating_players
+            ORDER BY points DESC, place
+        """).fetchall()
     with players_lock:
-        return [p.copy() for p in players]
+        rating_snapshot = build_rating_snapshot([(r["name"], r["place"], r["points"]) for r in rows])
+    return len(rows)
+
+
+# Per-date participant index for /api/rating?date=: date -> frozenset of names.
+# Filled from the DB on first use; registrations add to it, and removals
+# drop the date so it is rebuilt on the next request. Oldest dates are
+# evicted past DATE_PARTICIPANTS_MAX.
+DATE_PARTICIPANTS_MAX = 32
+
+date_participants_lock = threading.Lock()
+date_participants = {}
+date_participants_gen = 0  # bumped on every change, guards racing fills
+
+
+def get_date_participants(date):
+    names = date_participants.get(date)
+    if names is not None:
+        return names
+    gen = date_participants_gen
+    with get_db() as db:
+        rows = db.execute("""
+            SELECT DISTINCT er.player_name
+            FROM events e
+            JOIN event_registrations er ON er.event_id = e.id
+            WHERE e.date = ?
+        """, (date,)).fetchall()
+    names = frozenset(r["player_name"] for r in rows)
+    with date_participants_lock:
+        if gen == date_participants_gen:
+            date_participants.setdefault(date, names)
+            while len(date_participants) > DATE_PARTICIPANTS_MAX:
+                date_participants.pop(next(iter(date_participants)))
+    return names
+
+
+def add_date_participant(date, name):
+    global date_participants_gen
+    with date_participants_lock:
+        date_participants_gen += 1
+        names = date_participants.get(date)
+        if names is not None:
+            date_participants[date] = names | {name}
+
+
+def invalidate_date_participants(date):
+    global date_participants_gen
+    with date_participants_lock:
+        date_participants_gen += 1
+        date_participants.pop(date, None)
+
+
+def get_rating_data():
+    """Get current rating data sorted by points.
+
+    Returns the shared snapshot tuple; callers must not mutate the dicts.
+    """
+    return rating_snapshot["players"]
 
 
 @app.route("/php.php")
@@ -1885,31 +3218,6 @@ def api_register_telegram_user():
     
     try:
         with get_db() as db:
-            # Ensure telegram_users table exists
-            try:
-                db.execute("SELECT 1 FROM telegram_users LIMIT 1")
-            except sqlite3.OperationalError:
-                print("telegram_users table does not exist, creating it...")
-                db.execute("""
-                    CREATE TABLE IF NOT EXISTS telegram_users (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        telegram_id TEXT NOT NULL UNIQUE,
-                        first_name TEXT NOT NULL,
-                        last_name TEXT,
-                        username TEXT,
-                        language_code TEXT,
-                        is_bot BOOLEAN DEFAULT 0,
-                        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        registration_source TEXT DEFAULT 'telegram_widget',
-                        offer_accepted BOOLEAN DEFAULT 0,
-                        offer_accepted_at TIMESTAMP,
-                        game_nickname TEXT
-                    )
-                """)
-                db.commit()
-                print("telegram_users table created successfully")
-            
             # Check if user exists to preserve offer_accepted status
             existing = db.execute("SELECT offer_accepted, game_nickname FROM telegram_users WHERE telegram_id = ?", (telegram_id,)).fetchone()
             
@@ -2064,15 +3372,9 @@ def api_set_nickname():
     if not game_nickname:
         return jsonify({"ok": False, "error": "game_nickname required"}), 400
     
-    # Validate game_nickname: 2-20 chars, letters (lat/cyrillic), numbers, underscore, spaces
-    import re
-    game_nickname = game_nickname.strip()
-    if len(game_nickname) < 2 or len(game_nickname) > 20:
-        return jsonify({"ok": False, "error": "game_nickname должен содержать 2-20 символов"}), 400
-    if not re.match(r'^[a-zA-Zа-яА-ЯёЁ0-9_\s]+$', game_nickname):
-        return jsonify({"ok": False, "error": "game_nickname может содержать только буквы (лат/кирилл), цифры, пробелы и _"}), 400
-    if not game_nickname.replace(' ', '').replace('_', ''):
-        return jsonify({"ok": False, "error": "game_nickname не может состоять только из пробелов и подчеркиваний"}), 400
+    error = validate_game_nickname(game_nickname)
+    if error:
+        return jsonify({"ok": False, "error": error}), 400
     
     try:
         with get_db() as db:
@@ -2256,6 +3558,7 @@ def api_export_telegram_users():
 
 
 @app.route("/api/telegram/webhook", methods=["POST", "GET"])
+@no_compression
 def api_telegram_webhook():
     """Webhook endpoint for Telegram bot updates."""
     print(f"📥 Webhook called: method={request.method}, TELEGRAM_BOT_AVAILABLE={TELEGRAM_BOT_AVAILABLE}")
@@ -2268,7 +3571,8 @@ def api_telegram_webhook():
         # Telegram sends updates as JSON in POST body
         if request.method == "POST":
             update = request.get_json()
-            print(f"📨 Received update: {json.dumps(update, indent=2) if update else 'None'}")
+            # The bot module logs the update body
+            print(f"📨 Received update {update.get('update_id') if update else None}")
             
             if not update:
                 print("⚠️ No update data received")
@@ -2374,6 +3678,19 @@ def api_download_backup():
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+@app.route("/api/admin/emit-stats", methods=["GET"])
+def api_emit_stats():
+    """Socket.IO notification coalescing metrics (admin only)."""
+    token = request.args.get("token", "")
+    telegram_username = request.args.get("telegram_username", "")
+    try:
+        require_admin({"token": token, "telegram_username": telegram_username})
+    except PermissionError:
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    return jsonify({"ok": True, "stats": get_emit_stats()})
+
+
 @app.route("/api/telegram/setup-webhook", methods=["POST"])
 def api_setup_webhook():
     """Setup Telegram webhook (admin only)."""
@@ -2523,10 +3840,55 @@ def api_check_admin():
 
 @socketio.on("connect")
 def on_connect():
+    # Socket.IO handshakes bypass Flask's before_request
+    if not services_started:
+        start_services()
     with state_lock:
         emit("state", build_state())
 
 
+# Max rooms a client may join in one subscribe call (a week of dates, a month of ids)
+MAX_SUBSCRIPTION_KEYS = 31
+
+
+def subscription_rooms(data):
+    """Validate a subscribe/unsubscribe payload and return its room names."""
+    resource = (data or {}).get("resource")
+    if resource not in EMIT_RESOURCES.values():
+        return []
+    if resource == "rating":
+        return [resource_room(resource, None)]
+    keys = (data or {}).get("keys")
+    if not isinstance(keys, list):
+        keys = [(data or {}).get("key")]
+    rooms = []
+    for key in keys[:MAX_SUBSCRIPTION_KEYS]:
+        if key is None or key == "":
+            continue
+        if resource == "tournament":
+            try:
+                key = int(key)
+            except (ValueError, TypeError):
+                continue
+        rooms.append(resource_room(resource, key))
+    return rooms
+
+
+@socketio.on("subscribe")
+def on_subscribe(data):
+    for room in subscription_rooms(data):
+        join_room(room)
+        if room == "rating":
+            # Initial snapshot; later changes arrive through the room
+            emit("rating_update", {"players": get_rating_data()})
+
+
+@socketio.on("unsubscribe")
+def on_unsubscribe(data):
+    for room in subscription_rooms(data):
+        leave_room(room)
+
+
 @socketio.on("action")
 def on_action(data):
     action = (data or {}).get("action")
@@ -2620,11 +3982,11 @@ def handle_set_players(data):
     """Handle setting players list via socket."""
     player_list = (data or {}).get("players", [])
     if isinstance(player_list, list):
+        # Subscribers of the rating room get the new list from the update itself
         update_players_from_list(player_list)
-        socketio.emit("rating_update", {"players": get_rating_data()})
 
 
-# Initialize with default players
+# Default players for the simple rating
 default_players = [
     "13 reason for",
     "ANDREYU",
@@ -2643,29 +4005,6 @@ default_players = [
     "TanyaKoller",
     "dombrovich",
 ]
-update_players_from_list(default_players)
-
-
-# Initialize database on startup (with error handling)
-try:
-    init_db()
-    print("✅ Database initialized successfully")
-    print(f"📁 Database path: {DB_PATH}")
-    print(f"🔧 Mode: {'LOCAL' if LOCAL_MODE else 'PRODUCTION'}")
-except Exception as e:
-    print(f"❌ Error initializing database: {e}")
-    import traceback
-    traceback.print_exc()
-
-# Start timer thread (with error handling)
-try:
-    timer_thread = threading.Thread(target=timer_loop, daemon=True)
-    timer_thread.start()
-    print("Timer thread started successfully")
-except Exception as e:
-    print(f"Error starting timer thread: {e}")
-    import traceback
-    traceback.print_exc()
 
 def migrate_database():
     """Perform database migration/backup to prevent data loss."""
@@ -2684,6 +4023,9 @@ def migrate_database():
         
         # Copy database file to backup
         if os.path.exists(DB_PATH):
+            # Fold the WAL into the main file so the copy is complete
+            with get_db() as db:
+                db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
             shutil.copy2(DB_PATH, backup_path)
             print(f"✅ Database backup created: {backup_path}")
             
@@ -2767,13 +4109,79 @@ def kill_existing_port(port=8000):
     except subprocess.CalledProcessError:
         pass  # Никто порт не слушает
 
-# Start daily database migration scheduler
-try:
-    schedule_daily_migration()
-except Exception as e:
-    print(f"Error starting migration scheduler: {e}")
-    import traceback
-    traceback.print_exc()
+# Database warm-up and background threads. Importing the module only
+# defines the app; start_services() runs once per process, triggered by the
+# gunicorn post_worker_init hook (gunicorn.conf.py), the first request or
+# socket connection, or __main__ — whichever comes first.
+services_lock = threading.Lock()
+services_started = False
+
+
+def start_services():
+    """Initialize the database, load caches and start background threads (idempotent)."""
+    global services_started
+    if services_started:
+        return
+    with services_lock:
+        if services_started:
+            return
+        started = time.perf_counter()
+        
+        # Initialize database. On failure services_started stays False and
+        # the error propagates, so the next request retries from here
+        # before any background thread has been started.
+        try:
+            init_db()
+            load_tournament_cache()
+            print("✅ Database initialized successfully")
+            print(f"📁 Database path: {DB_PATH}")
+            print(f"🔧 Mode: {'LOCAL' if LOCAL_MODE else 'PRODUCTION'}")
+        except Exception as e:
+            print(f"❌ Error initializing database: {e}")
+            raise
+        
+        # Load the persisted rating (seeded once by migration_007_seed_rating)
+        try:
+            load_rating_from_db()
+        except Exception as e:
+            print(f"❌ Error loading rating: {e}")
+            raise
+        
+        # Start timer thread (with error handling)
+        try:
+            timer_thread = threading.Thread(target=timer_loop, daemon=True)
+            timer_thread.start()
+            print("Timer thread started successfully")
+        except Exception as e:
+            print(f"Error starting timer thread: {e}")
+            import traceback
+            traceback.print_exc()
+        
+        # Start Telegram notification thread
+        try:
+            notification_thread = threading.Thread(target=notification_worker, daemon=True)
+            notification_thread.start()
+        except Exception as e:
+            print(f"Error starting notification thread: {e}")
+            import traceback
+            traceback.print_exc()
+        
+        # Start daily database migration scheduler
+        try:
+            schedule_daily_migration()
+        except Exception as e:
+            print(f"Error starting migration scheduler: {e}")
+            import traceback
+            traceback.print_exc()
+        
+        services_started = True
+        print(f"✅ Services started in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+@app.before_request
+def ensure_services():
+    if not services_started:
+        start_services()
 
 # Don't kill port on production (Cloud Run, Amvera, GAE) or when running as module or in local mode
 is_production_env = (
@@ -2788,6 +4196,7 @@ if not is_production_env and os.environ.get("LOCAL_MODE") != "true" and __name__
     kill_existing_port(8000)
 
 if __name__ == "__main__":
+    start_services()
     port = int(os.environ.get("PORT", "8000"))
     socketio.run(app, host="0.0.0.0", port=port, allow_unsafe_werkzeug=True)
 
@@ -0,0 +1,101 @@
+"""
+ASGI entry point: the same routes and Socket.IO events on an asyncio server.
+
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+
+Flask routes run in a pool of ASGI_WORKERS threads owned by a2wsgi, so
+their blocking sqlite3 calls never stall the event loop. Socket.IO is
+served by python-socketio's AsyncServer, whose handlers run the app's sync
+code in a second pool of ASGI_WORKERS threads (a2wsgi can't share its
+pool), so up to 2 * ASGI_WORKERS threads may hit SQLite at once. The
+timer and notification threads emit through the loop (app.socket_emitter).
+Outbound Telegram calls already run on the notification worker thread, and
+under this server it is a real OS thread.
+
+The eventlet worker (gunicorn -k eventlet, see Dockerfile) stays the
+default deployment; SERVER_MODE is set to "asgi" here before the import.
+"""
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["SERVER_MODE"] = "asgi"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import socketio  # noqa: E402
+from a2wsgi import WSGIMiddleware  # noqa: E402
+
+import app as pulse  # noqa: E402
+
+ASGI_WORKERS = int(os.environ.get("ASGI_WORKERS", "16"))
+
+# Socket.IO handlers' pool; a2wsgi creates its own for the routes
+executor = ThreadPoolExecutor(max_workers=ASGI_WORKERS, thread_name_prefix="pulse-sync")
+sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*", json=pulse.SocketIOJSON)
+
+
+class LoopEmitter:
+    """socketio.emit() for worker threads: schedules the emit on the event loop."""
+
+    def __init__(self, server):
+        self.server = server
+        self.loop = None
+
+    def emit(self, event, data=None, to=None):
+        # Nothing is connected before startup
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.server.emit(event, data, to=to), self.loop)
+
+
+emitter = LoopEmitter(sio)
+pulse.socket_emitter = emitter
+
+
+async def run_sync(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+def current_state():
+    with pulse.state_lock:
+        return pulse.build_state()
+
+
+@sio.event
+async def connect(sid, environ):
+    await run_sync(pulse.start_services)
+    await sio.emit("state", await run_sync(current_state), to=sid)
+
+
+@sio.event
+async def subscribe(sid, data):
+    for room in pulse.subscription_rooms(data):
+        await sio.enter_room(sid, room)
+        if room == "rating":
+            # Initial snapshot; later changes arrive through the room
+            await sio.emit("rating_update", {"players": await run_sync(pulse.get_rating_data)}, to=sid)
+
+
+@sio.event
+async def unsubscribe(sid, data):
+    for room in pulse.subscription_rooms(data):
+        await sio.leave_room(sid, room)
+
+
+@sio.event
+async def action(sid, data):
+    await run_sync(pulse.on_action, data)
+
+
+async def startup():
+    emitter.loop = asyncio.get_running_loop()
+    # Warm up in the background; the first request waits for it if needed
+    emitter.loop.run_in_executor(executor, pulse.start_services)
+
+
+application = socketio.ASGIApp(
+    sio,
+    other_asgi_app=WSGIMiddleware(pulse.app, workers=ASGI_WORKERS),
+    on_startup=startup,
+)
@@ -0,0 +1,85 @@
+"""
+Benchmark: poker tournament finalization for large player fields.
+
+Seeds a throwaway database with one poker event whose players all have a
+final place, then times POST /api/poker-tournament/<date>/finalize.
+The first run creates the players, later runs update existing results.
+
+Usage:
+    python benchmarks/bench_finalize.py --players 100 200 500 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Throwaway database, set before importing the app
+os.environ["DB_DIR"] = tempfile.mkdtemp(prefix="pulse_bench_")
+os.environ.setdefault("EMIT_COALESCE_WINDOW", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as pulse  # noqa: E402
+
+pulse.start_services()
+
+
+def seed_event(date, size):
+    """Create a poker event with `size` finished players, half of them with telegram_id."""
+    with pulse.get_db() as db:
+        cursor = db.execute("""
+            INSERT INTO events (date, time, event_type, description)
+            VALUES (?, ?, 'Покер', 'bench')
+        """, (date, f"{size % 24:02d}:00"))
+        event_id = cursor.lastrowid
+        regs = []
+        states = []
+        for i in range(size):
+            name = f"bench_{event_id}_{i}"
+            telegram_id = f"tg_{event_id}_{i}" if i % 2 == 0 else None
+            regs.append((event_id, name, telegram_id))
+            states.append((event_id, name, i + 1, 100 * (i % 3)))
+        db.executemany("""
+            INSERT INTO event_registrations (event_id, player_name, telegram_id)
+            VALUES (?, ?, ?)
+        """, regs)
+        db.executemany("""
+            INSERT INTO tournament_player_states (event_id, player_name, final_place, bonus_points)
+            VALUES (?, ?, ?, ?)
+        """, states)
+    return event_id
+
+
+def run(size, repeat):
+    client = pulse.app.test_client()
+    date = f"{datetime.now().year}-11-{(size % 28) + 1:02d}"
+    event_id = seed_event(date, size)
+    url = f"/api/poker-tournament/{date}/finalize"
+    body = {"token": pulse.ADMIN_TOKEN, "event_id": event_id}
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.post(url, json=body)
+        timings.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise SystemExit(f"finalize failed: {response.status_code} {response.get_json()}")
+
+    first, rest = timings[0], timings[1:] or timings
+    print(f"{size:>6} players | first {first * 1000:8.2f} ms | "
+          f"repeat avg {sum(rest) / len(rest) * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, nargs="+", default=[100, 250, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.players:
+        run(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
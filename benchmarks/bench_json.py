@@ -0,0 +1,107 @@
+"""
+Benchmark: JSON encode time per payload, stdlib vs the app's provider.
+
+Builds the hot payloads from a throwaway database (timer state, a 30-game
+tournament grid of `--players` players, a month of events, the simple
+rating, a Telegram update) and times encoding each one `--repeat` times:
+  stdlib   - json.dumps as Flask's default provider calls it
+  provider - app.json.dumps (orjson when installed)
+  cached   - /api/tournament/<id> served from its pre-serialized body
+
+Usage:
+    python benchmarks/bench_json.py --players 500 --repeat 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Throwaway database, set before importing the app
+os.environ["DB_DIR"] = tempfile.mkdtemp(prefix="pulse_bench_")
+os.environ.setdefault("EMIT_COALESCE_WINDOW", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as pulse  # noqa: E402
+
+pulse.start_services()
+
+
+def seed(players, games):
+    """A tournament with `players` players scored in `games` games, and a month of events."""
+    year = datetime.now().year
+    with pulse.get_db() as db:
+        tournament_id = db.execute(
+            "INSERT INTO tournaments (name, month, year) VALUES ('bench', 'Декабрь', ?)", (year,)
+        ).lastrowid
+        db.executemany("INSERT INTO players (name) VALUES (?)", [(f"Игрок {i}",) for i in range(players)])
+        ids = [row["id"] for row in db.execute("SELECT id FROM players")]
+        db.executemany("""
+            INSERT OR REPLACE INTO tournament_results (tournament_id, player_id, game_number, score)
+            VALUES (?, ?, ?, ?)
+        """, [(tournament_id, pid, game, (pid * game) % 300) for pid in ids for game in range(1, games + 1)])
+        db.executemany("""
+            INSERT INTO events (date, time, event_type, description, max_places)
+            VALUES (?, '19:00', 'Покер', 'Еженедельный турнир', 20)
+        """, [(f"{year}-12-{day:02d}",) for day in range(1, 31)])
+    return tournament_id, year
+
+
+def time_per_call(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--games", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    tournament_id, year = seed(args.players, args.games)
+    with pulse.get_db() as db:
+        grid = {"ok": True, "data": pulse.build_tournament_grid(db, tournament_id)}
+        events = {"ok": True, "events": pulse.query_events_feed(db, f"{year}-12-01", f"{year}-12-31")}
+    pulse.update_players_from_list([f"Игрок {i}" for i in range(min(args.players, 100))])
+    payloads = {
+        "timer state": pulse.build_state(),
+        "tournament grid": grid,
+        "events month": events,
+        "rating": {"ok": True, "players": list(pulse.rating_snapshot["players"])},
+        "telegram update": {
+            "update_id": 1, "message": {
+                "message_id": 1, "date": 0, "text": "/start",
+                "from": {"id": 1, "first_name": "Имя", "username": "user", "language_code": "ru"},
+                "chat": {"id": 1, "type": "private"},
+            },
+        },
+    }
+
+    print(f"JSON backend: {'orjson' if pulse.orjson else 'stdlib'}")
+    print(f"{'payload':<16} {'size':>9} | {'stdlib':>10} | {'provider':>10} | speedup")
+    for name, payload in payloads.items():
+        size = len(pulse.app.json.dumps(payload).encode())
+        stdlib = time_per_call(
+            lambda: json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(",", ":")), args.repeat
+        )
+        provider = time_per_call(lambda: pulse.app.json.dumps(payload), args.repeat)
+        print(f"{name:<16} {size / 1024:6.1f} KB | {stdlib * 1e6:7.1f} us | {provider * 1e6:7.1f} us | "
+              f"{stdlib / provider:5.1f}x")
+
+    client = pulse.app.test_client()
+    client.get(f"/api/tournament/{tournament_id}")
+    cached = time_per_call(lambda: client.get(f"/api/tournament/{tournament_id}"), args.repeat)
+    pulse.invalidate_tournament_bodies()
+    rebuilt = time_per_call(
+        lambda: (pulse.invalidate_tournament_bodies(), client.get(f"/api/tournament/{tournament_id}")), args.repeat
+    )
+    print(f"GET /api/tournament/{tournament_id}: {rebuilt * 1000:.2f} ms rebuilt, {cached * 1000:.2f} ms cached")
+
+
+if __name__ == "__main__":
+    main()
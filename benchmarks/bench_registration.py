@@ -0,0 +1,83 @@
+"""
+Benchmark: sequential registrations per second.
+
+Seeds a throwaway database with events and authorized Telegram users, then
+times POST /api/events/<id>/register one request after another, which is
+the per-request cost of the registration path (validation, auth read,
+capacity check, insert).
+
+Usage:
+    python benchmarks/bench_registration.py --registrations 2000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Throwaway database, set before importing the app
+os.environ["DB_DIR"] = tempfile.mkdtemp(prefix="pulse_bench_")
+os.environ.setdefault("EMIT_COALESCE_WINDOW", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as pulse  # noqa: E402
+
+pulse.start_services()
+
+# Don't message the seeded telegram ids
+pulse.TELEGRAM_BOT_AVAILABLE = False
+
+
+def seed_users(count):
+    with pulse.get_db() as db:
+        db.executemany("""
+            INSERT OR IGNORE INTO telegram_users (telegram_id, first_name, offer_accepted, game_nickname)
+            VALUES (?, ?, 1, ?)
+        """, [(f"tg_{i}", f"bench {i}", f"bench_{i}") for i in range(count)])
+
+
+def seed_event(run, places):
+    with pulse.get_db() as db:
+        cursor = db.execute("""
+            INSERT INTO events (date, time, event_type, description, max_places)
+            VALUES (?, ?, 'Покер', 'bench', ?)
+        """, (f"{datetime.now().year}-12-01", f"{run % 24:02d}:00", places))
+        return cursor.lastrowid
+
+
+def run(client, run_no, count):
+    event_id = seed_event(run_no, count)
+    url = f"/api/events/{event_id}/register"
+    started = time.perf_counter()
+    for i in range(count):
+        response = client.post(url, json={
+            "player_name": f"bench_{i}",
+            "game_nickname": f"bench_{i}",
+            "telegram_id": f"tg_{i}",
+        })
+        if response.status_code != 200:
+            raise SystemExit(f"register failed: {response.status_code} {response.get_json()}")
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--registrations", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    seed_users(args.registrations)
+    client = pulse.app.test_client()
+    best = None
+    for run_no in range(args.repeat):
+        elapsed = run(client, run_no, args.registrations)
+        rate = args.registrations / elapsed
+        best = rate if best is None else max(best, rate)
+        print(f"run {run_no + 1}: {args.registrations} registrations in {elapsed * 1000:8.1f} ms "
+              f"({rate:7.0f}/s, {elapsed / args.registrations * 1e6:6.0f} us each)")
+    print(f"best {best:.0f} registrations/s")
+
+
+if __name__ == "__main__":
+    main()
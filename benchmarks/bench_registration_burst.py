@@ -0,0 +1,123 @@
+"""
+Benchmark: burst of simultaneous registrations for one event.
+
+Seeds a throwaway database with one event of `--places` places and
+`--players` authorized Telegram users, then fires all registrations at once
+from separate threads. Checks that the event is never overbooked and that
+everyone else ended up on the waitlist in a consistent FIFO order, then
+unregisters a few players and checks the waitlist gets promoted.
+
+Usage:
+    python benchmarks/bench_registration_burst.py --players 300 --places 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Throwaway database, set before importing the app
+os.environ["DB_DIR"] = tempfile.mkdtemp(prefix="pulse_bench_")
+os.environ.setdefault("EMIT_COALESCE_WINDOW", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as pulse  # noqa: E402
+
+pulse.start_services()
+
+# Don't message the seeded telegram ids
+pulse.TELEGRAM_BOT_AVAILABLE = False
+
+
+def seed(players, places):
+    """Create one event and `players` users who accepted the offer."""
+    with pulse.get_db() as db:
+        cursor = db.execute("""
+            INSERT INTO events (date, time, event_type, description, max_places)
+            VALUES (?, '19:00', 'Покер', 'bench', ?)
+        """, (f"{datetime.now().year}-12-01", places))
+        event_id = cursor.lastrowid
+        db.executemany("""
+            INSERT INTO telegram_users (telegram_id, first_name, offer_accepted, game_nickname)
+            VALUES (?, ?, 1, ?)
+        """, [(f"tg_{i}", f"bench {i}", f"bench_{i}") for i in range(players)])
+    return event_id
+
+
+def register(event_id, i, barrier, results):
+    client = pulse.app.test_client()
+    barrier.wait()
+    started = time.perf_counter()
+    response = client.post(f"/api/events/{event_id}/register", json={
+        "player_name": f"bench_{i}",
+        "game_nickname": f"bench_{i}",
+        "telegram_id": f"tg_{i}",
+    })
+    results[i] = (response.status_code, response.get_json(), time.perf_counter() - started)
+
+
+def counts(event_id):
+    with pulse.get_db() as db:
+        registered = db.execute(
+            "SELECT COUNT(*) as count FROM event_registrations WHERE event_id = ?", (event_id,)
+        ).fetchone()["count"]
+        waitlisted = db.execute(
+            "SELECT COUNT(*) as count FROM event_waitlist WHERE event_id = ?", (event_id,)
+        ).fetchone()["count"]
+    return registered, waitlisted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--places", type=int, default=20)
+    parser.add_argument("--release", type=int, default=5, help="players to unregister afterwards")
+    args = parser.parse_args()
+
+    event_id = seed(args.players, args.places)
+    barrier = threading.Barrier(args.players)
+    results = [None] * args.players
+    threads = [
+        threading.Thread(target=register, args=(event_id, i, barrier, results))
+        for i in range(args.players)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    failed = [r for r in results if r[0] != 200 or not r[1].get("ok")]
+    if failed:
+        raise SystemExit(f"{len(failed)} registrations failed, e.g. {failed[0][:2]}")
+    positions = sorted(r[1]["position"] for r in results if r[1]["waitlisted"])
+    registered, waitlisted = counts(event_id)
+    latencies = sorted(r[2] for r in results)
+
+    print(f"{args.players} registrations in {elapsed * 1000:.1f} ms "
+          f"({args.players / elapsed:.0f}/s, p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms)")
+    print(f"registered {registered}/{args.places}, waitlisted {waitlisted}")
+    assert registered == min(args.places, args.players), "event overbooked or underfilled"
+    assert waitlisted == args.players - registered
+    assert positions == list(range(1, waitlisted + 1)), "waitlist positions not FIFO"
+
+    client = pulse.app.test_client()
+    with pulse.get_db() as db:
+        leaving = [row["telegram_id"] for row in db.execute("""
+            SELECT telegram_id FROM event_registrations WHERE event_id = ? LIMIT ?
+        """, (event_id, args.release))]
+    for telegram_id in leaving:
+        client.post(f"/api/events/{event_id}/unregister", json={"telegram_id": telegram_id})
+    registered, after = counts(event_id)
+    print(f"after {len(leaving)} unregistrations: registered {registered}, waitlisted {after}")
+    assert registered == min(args.places, args.players - len(leaving))
+    assert after == max(0, waitlisted - len(leaving))
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
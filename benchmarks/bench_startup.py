@@ -0,0 +1,66 @@
+"""
+Benchmark: cold start of the app in a fresh interpreter.
+
+Each run starts a new Python process on a fresh throwaway database and
+measures three phases:
+  import  - `import app` (what gunicorn does before serving)
+  first   - the first request, which pays for start_services()
+  warm    - a second request
+Reports the median and worst of each over `--repeat` runs.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import app as pulse
+application = pulse.app
+imported = time.perf_counter()
+client = application.test_client()
+client.get("/api/rating")
+first = time.perf_counter()
+client.get("/api/rating")
+warm = time.perf_counter()
+print(json.dumps({{
+    "import": imported - started,
+    "first": first - imported,
+    "warm": warm - first,
+}}))
+"""
+
+
+def run_once():
+    env = dict(os.environ, DB_DIR=tempfile.mkdtemp(prefix="pulse_bench_"), EMIT_COALESCE_WINDOW="0")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    # The app prints banners; the timings are the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+    for phase in ("import", "first", "warm"):
+        values = sorted(run[phase] for run in runs)
+        print(f"{phase:>6} | median {values[len(values) // 2] * 1000:8.2f} ms | "
+              f"max {values[-1] * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark: concurrent Socket.IO clients on the eventlet and the ASGI server.
+
+For each mode, starts the server on a throwaway database, connects
+`--clients` websocket clients (as phones on /timer do), starts the blinds
+timer as admin and listens to its ticks for `--seconds`. Reports per mode:
+  connect  - p50/p99 time from connect() to the first "state" event
+  delivery - p50/p99 delay of a tick from the server to each client
+  dropped  - ticks a client never got, of those sent while it was connected
+  cpu      - server process CPU time during the run
+
+Needs the ASGI extras on the client side too (python-socketio's async
+client uses aiohttp):
+    pip install -r requirements-asgi.txt
+    python benchmarks/bench_websockets.py --clients 200 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import socketio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_TOKEN = "bench-admin"
+
+SERVERS = {
+    "eventlet": [
+        # Monkey-patched first, as gunicorn's eventlet worker does
+        sys.executable, "-c",
+        "import eventlet; eventlet.monkey_patch(); import app; app.start_services(); "
+        "app.socketio.run(app.app, host='127.0.0.1', port={port}, log_output=False)",
+    ],
+    "asgi": [
+        sys.executable, "-m", "uvicorn", "asgi:application",
+        "--host", "127.0.0.1", "--port", "{port}", "--log-level", "warning",
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cpu_seconds(pid):
+    """utime + stime of a process (Linux /proc)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server(mode, port, extra_env=None):
+    env = dict(
+        os.environ, DB_DIR=tempfile.mkdtemp(prefix="pulse_bench_"), ADMIN_TOKEN=ADMIN_TOKEN,
+        EMIT_COALESCE_WINDOW="0",
+    )
+    env.update(extra_env or {})
+    command = [part.format(port=port) for part in SERVERS[mode]]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/rating", timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit(f"{mode} server did not start")
+
+
+class Phone:
+    """One timer client: connect latency and the ticks it received."""
+
+    def __init__(self):
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.connected = asyncio.Event()
+        self.connect_latency = None
+        self.ticks = {}  # state version -> delivery delay
+        self.client.on("state", self.on_state)
+
+    async def on_state(self, data):
+        now = time.time()
+        if not self.connected.is_set():
+            self.connect_latency = time.perf_counter() - self.started
+            self.connected.set()
+        elif data.get("isRunning"):
+            self.ticks[data["version"]] = now - data["lastUpdate"]
+
+    async def connect(self, url):
+        self.started = time.perf_counter()
+        await self.client.connect(url, transports=["websocket"])
+        await asyncio.wait_for(self.connected.wait(), 30)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+async def run_clients(url, clients, seconds):
+    phones = [Phone() for _ in range(clients)]
+    results = await asyncio.gather(*(phone.connect(url) for phone in phones), return_exceptions=True)
+    failed = sum(isinstance(result, Exception) for result in results)
+    phones = [phone for phone, result in zip(phones, results) if not isinstance(result, Exception)]
+
+    admin = socketio.AsyncClient(reconnection=False)
+    sent = set()
+    admin.on("state", lambda data: data.get("isRunning") and sent.add(data["version"]))
+    await admin.connect(url, transports=["websocket"])
+    await admin.emit("action", {"action": "toggle", "token": ADMIN_TOKEN})
+    await asyncio.sleep(seconds)
+    await admin.emit("action", {"action": "toggle", "token": ADMIN_TOKEN})
+    await asyncio.sleep(1)
+
+    for client in [admin] + [phone.client for phone in phones]:
+        await client.disconnect()
+    return phones, sent, failed
+
+
+def run_mode(mode, clients, seconds):
+    port = free_port()
+    server = start_server(mode, port)
+    try:
+        cpu_before = cpu_seconds(server.pid)
+        phones, sent, failed = asyncio.run(run_clients(f"http://127.0.0.1:{port}", clients, seconds))
+        cpu = cpu_seconds(server.pid) - cpu_before
+    finally:
+        server.terminate()
+        server.wait()
+
+    delays = [delay for phone in phones for delay in phone.ticks.values()]
+    dropped = sum(len(sent - phone.ticks.keys()) for phone in phones)
+    connects = [phone.connect_latency for phone in phones]
+    print(f"{mode:>8} | connect p50 {percentile(connects, 0.5) * 1000:7.1f} ms "
+          f"p99 {percentile(connects, 0.99) * 1000:7.1f} ms | "
+          f"delivery p50 {percentile(delays, 0.5) * 1000:6.1f} ms p99 {percentile(delays, 0.99) * 1000:6.1f} ms | "
+          f"dropped {dropped}/{len(sent) * len(phones)} | failed {failed} | cpu {cpu:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--modes", nargs="+", choices=sorted(SERVERS), default=["eventlet", "asgi"])
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.seconds:g} s of timer ticks")
+    for mode in args.modes:
+        run_mode(mode, args.clients, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
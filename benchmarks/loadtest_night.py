@@ -0,0 +1,305 @@
+"""
+Load test: a tournament night against a local server, fully offline.
+
+Starts the server (eventlet or ASGI, see bench_websockets.py) on a throwaway
+database with the bot pointed at a local fake Telegram API, then runs each
+scenario alone and finally all of them together ("night"):
+  timer        - `--phones` Socket.IO clients watch the running blinds timer
+  rating       - `--pollers` clients poll /api/rating every `--poll-interval` s
+  registration - `--players` users register at once for an event of `--places`
+                 places; the rest go to the waitlist
+  scoring      - the admin scores `--score-rate` cells/s while `--watchers`
+                 clients subscribed to the tournament room receive the pushes
+Per scenario it reports p50/p99 latency, dropped emits (timer ticks or score
+pushes a client never received) and the server's CPU time.
+
+    pip install -r requirements-asgi.txt
+    python benchmarks/loadtest_night.py --phones 300 --pollers 50 --players 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import socketio
+
+from bench_websockets import ADMIN_TOKEN, SERVERS, Phone, cpu_seconds, free_port, percentile, start_server
+
+SCENARIOS = ("timer", "rating", "registration", "scoring")
+
+
+class FakeTelegram(BaseHTTPRequestHandler):
+    """Bot API stand-in: answers ok to every method and counts the calls."""
+
+    calls = {}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.answer()
+
+    def do_GET(self):
+        self.answer()
+
+    def answer(self):
+        method = self.path.rsplit("/", 1)[-1].split("?")[0]
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        body = json.dumps({"ok": True, "result": {"message_id": 1, "url": ""}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_telegram():
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), FakeTelegram)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def seed_players(db_path, players, places, tag):
+    """An event of `places` places and `players` users who accepted the offer."""
+    with sqlite3.connect(db_path, timeout=30) as db:
+        event_id = db.execute("""
+            INSERT INTO events (date, time, event_type, description, max_places)
+            VALUES (?, '19:00', 'Покер', ?, ?)
+        """, (f"{datetime.now().year}-12-{random.randint(1, 28):02d}", f"loadtest {tag}", places)).lastrowid
+        db.executemany("""
+            INSERT INTO telegram_users (telegram_id, first_name, offer_accepted, game_nickname)
+            VALUES (?, ?, 1, ?)
+        """, [(f"lt_{tag}_{i}", f"load {i}", f"lt_{tag}_{i}") for i in range(players)])
+    return event_id
+
+
+class Run:
+    """Latencies, dropped emits and notes of one scenario."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = []  # (label, latencies, dropped, expected)
+        self.notes = []
+
+    def add(self, label, latencies, dropped=None, expected=None):
+        self.rows.append((label, latencies, dropped, expected))
+
+    def report(self, cpu):
+        print(f"── {self.name} (server cpu {cpu:.2f} s)")
+        for label, latencies, dropped, expected in self.rows:
+            line = (f"   {label:<22} n={len(latencies):<6} p50 {percentile(latencies, 0.5) * 1000:8.1f} ms "
+                    f"p99 {percentile(latencies, 0.99) * 1000:8.1f} ms")
+            if dropped is not None:
+                line += f" | dropped {dropped}/{expected}"
+            print(line)
+        for note in self.notes:
+            print(f"   {note}")
+
+
+async def scenario_timer(url, args, run):
+    phones = [Phone() for _ in range(args.phones)]
+    results = await asyncio.gather(*(phone.connect(url) for phone in phones), return_exceptions=True)
+    phones = [phone for phone, result in zip(phones, results) if not isinstance(result, Exception)]
+    if len(phones) < args.phones:
+        run.notes.append(f"{args.phones - len(phones)} phones failed to connect")
+
+    admin = socketio.AsyncClient(reconnection=False)
+    sent = set()
+    admin.on("state", lambda data: data.get("isRunning") and sent.add(data["version"]))
+    await admin.connect(url, transports=["websocket"])
+    await admin.emit("action", {"action": "toggle", "token": ADMIN_TOKEN})
+    await asyncio.sleep(args.seconds)
+    await admin.emit("action", {"action": "toggle", "token": ADMIN_TOKEN})
+    await asyncio.sleep(1)
+    for client in [admin] + [phone.client for phone in phones]:
+        await client.disconnect()
+
+    run.add("connect", [phone.connect_latency for phone in phones])
+    run.add("tick delivery", [delay for phone in phones for delay in phone.ticks.values()],
+            sum(len(sent - phone.ticks.keys()) for phone in phones), len(sent) * len(phones))
+
+
+async def scenario_rating(url, args, run, session):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + args.seconds
+
+    async def poller():
+        nonlocal errors
+        # Spread the first polls over the interval, as real page loads are
+        await asyncio.sleep(random.random() * args.poll_interval)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with session.get(f"{url}/api/rating") as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(args.poll_interval)
+
+    await asyncio.gather(*(poller() for _ in range(args.pollers)))
+    run.add("GET /api/rating", latencies)
+    if errors:
+        run.notes.append(f"{errors} failed polls")
+
+
+async def scenario_registration(url, args, run, session, db_path, telegram, tag):
+    event_id = seed_players(db_path, args.players, args.places, tag)
+    sent_before = telegram.RequestHandlerClass.calls.get("sendMessage", 0)
+    latencies, outcomes = [], []
+
+    async def register(i):
+        started = time.perf_counter()
+        async with session.post(f"{url}/api/events/{event_id}/register", json={
+            "player_name": f"lt_{tag}_{i}",
+            "game_nickname": f"lt_{tag}_{i}",
+            "telegram_id": f"lt_{tag}_{i}",
+        }) as response:
+            outcomes.append(await response.json())
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(register(i) for i in range(args.players)))
+    registered = sum(1 for outcome in outcomes if outcome.get("ok") and not outcome.get("waitlisted"))
+    waitlisted = sum(1 for outcome in outcomes if outcome.get("waitlisted"))
+    failed = len(outcomes) - registered - waitlisted
+
+    # Confirmations leave one by one from the server's notification worker
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        confirmed = telegram.RequestHandlerClass.calls.get("sendMessage", 0) - sent_before
+        if confirmed >= registered:
+            break
+        await asyncio.sleep(0.2)
+
+    run.add("POST register", latencies)
+    run.notes.append(f"registered {registered}/{args.places}, waitlisted {waitlisted}, failed {failed}, "
+                     f"telegram confirmations {confirmed}/{registered}")
+    if registered != min(args.places, args.players):
+        run.notes.append("⚠️ event overbooked or underfilled")
+
+
+async def scenario_scoring(url, args, run, session, tournament_id, player_ids, game_offset):
+    watchers = [socketio.AsyncClient(reconnection=False) for _ in range(args.watchers)]
+    received = [set() for _ in watchers]
+
+    def on_update(seen):
+        def handler(data):
+            for player in data.get("players") or ():
+                for game, score in player["scores"].items():
+                    seen.add((player["id"], int(game), score))
+        return handler
+
+    for watcher, seen in zip(watchers, received):
+        watcher.on("tournament_update", on_update(seen))
+        await watcher.connect(url, transports=["websocket"])
+        await watcher.emit("subscribe", {"resource": "tournament", "key": tournament_id})
+    await asyncio.sleep(0.5)
+
+    # Every write goes to its own cell so the pushes can't supersede each other
+    cells = [(pid, game) for game in range(game_offset + 1, game_offset + 32) for pid in player_ids]
+    writes = cells[:int(args.score_rate * args.seconds)]
+    latencies = []
+    for n, (player_id, game) in enumerate(writes):
+        started = time.perf_counter()
+        async with session.post(f"{url}/api/tournament/{tournament_id}/score", json={
+            "token": ADMIN_TOKEN, "player_id": player_id, "game_number": game, "score": n + 1,
+        }) as response:
+            await response.read()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(max(0.0, 1 / args.score_rate - latencies[-1]))
+    await asyncio.sleep(1.5)  # coalescing window + delivery
+
+    expected = {(pid, game, n + 1) for n, (pid, game) in enumerate(writes)}
+    for watcher in watchers:
+        await watcher.disconnect()
+    run.add("POST score", latencies,
+            sum(len(expected - seen) for seen in received), len(expected) * len(watchers))
+
+
+async def tournament_players(url, session):
+    async with session.get(f"{url}/api/tournaments", params={"recent": 1}) as response:
+        tournaments = (await response.json())["tournaments"]
+    tournament_id = tournaments[0]["id"]
+    async with session.get(f"{url}/api/tournament/{tournament_id}") as response:
+        players = (await response.json())["data"]["players"]
+    return tournament_id, [player["id"] for player in players]
+
+
+async def run_all(url, args, server_pid, db_path, telegram):
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        tournament_id, player_ids = await tournament_players(url, session)
+
+        def scenario(name, tag, game_offset):
+            run = Run(name)
+            jobs = {
+                "timer": lambda: scenario_timer(url, args, run),
+                "rating": lambda: scenario_rating(url, args, run, session),
+                "registration": lambda: scenario_registration(url, args, run, session, db_path, telegram, tag),
+                "scoring": lambda: scenario_scoring(url, args, run, session, tournament_id, player_ids, game_offset),
+            }
+            return run, jobs
+
+        for index, name in enumerate(args.scenarios):
+            run, jobs = scenario(name, f"s{index}", 0)
+            cpu = cpu_seconds(server_pid)
+            await jobs[name]()
+            run.report(cpu_seconds(server_pid) - cpu)
+
+        if args.night:
+            run, jobs = scenario("night: everything at once", "night", 31)
+            cpu = cpu_seconds(server_pid)
+            await asyncio.gather(*(jobs[name]() for name in args.scenarios))
+            run.report(cpu_seconds(server_pid) - cpu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=sorted(SERVERS), default="eventlet")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--no-night", dest="night", action="store_false", help="skip the combined run")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of the timer, rating and scoring runs")
+    parser.add_argument("--phones", type=int, default=200)
+    parser.add_argument("--pollers", type=int, default=50)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--places", type=int, default=20)
+    parser.add_argument("--watchers", type=int, default=20)
+    parser.add_argument("--score-rate", type=float, default=5, help="score writes per second")
+    args = parser.parse_args()
+
+    telegram = start_fake_telegram()
+    db_dir = tempfile.mkdtemp(prefix="pulse_loadtest_")
+    port = free_port()
+    server = start_server(args.mode, port, {
+        "DB_DIR": db_dir,
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{telegram.server_address[1]}",
+        "TELEGRAM_BOT_TOKEN": "loadtest",
+        # Production defaults, unlike the websocket micro-benchmark
+        "EMIT_COALESCE_WINDOW": os.environ.get("EMIT_COALESCE_WINDOW", "0.3"),
+    })
+    print(f"{args.mode} server on :{port}, database {db_dir}")
+    try:
+        asyncio.run(run_all(f"http://127.0.0.1:{port}", args, server.pid,
+                            os.path.join(db_dir, "pulse_tournaments.db"), telegram))
+    finally:
+        server.terminate()
+        server.wait()
+        telegram.shutdown()
+    print(f"fake Telegram API calls: {dict(FakeTelegram.calls)}")
+
+
+if __name__ == "__main__":
+    main()
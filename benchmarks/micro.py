@@ -0,0 +1,274 @@
+"""
+Micro-benchmarks for the core pure functions and data builders.
+
+Cases run against synthetic data in a throwaway database:
+  timer/*       - build_state, stage_duration_seconds over every level
+  rating/*      - calculate_points over 30 places, update_players_from_list
+  tournament/*  - the /api/tournament/<id> grid of a 30-game month, 500 players
+  events/*      - the /api/events feed and a regular's registrations for
+                  January, in a year of events holding 1k / 10k / 100k
+                  registrations (the regular holds 1% of them)
+Each case is timed with timeit: calls are batched until a batch takes at
+least 0.2 s, then `--repeat` batches are run and the best and median
+per-call times are kept.
+
+    python benchmarks/micro.py run [-k events] [--save PATH]
+    python benchmarks/micro.py compare --against origin/main [--threshold 0.25]
+    python benchmarks/micro.py compare --baseline PATH
+
+`compare` runs the suite and exits with status 1 when a case's best time is
+more than `--threshold` slower than in the baseline. With `--against` the
+baseline is measured in the same run: the git ref is checked out into a
+temporary worktree and the same cases are timed against its app.py. A
+`--baseline` file is a local artifact of an earlier `run --save` on this
+machine (benchmarks/baselines/ is gitignored).
+"""
+import argparse
+import calendar
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from contextlib import ExitStack
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "micro.json")
+REGISTRATION_SIZES = (1_000, 10_000, 100_000)
+EVENTS_PER_DAY = ("12:00", "15:00", "18:00", "21:00")
+TOURNAMENT_PLAYERS = 500
+TOURNAMENT_GAMES = 30
+
+CASES = {}  # name -> setup(db) returning the zero-argument callable to time
+pulse = None  # the app module under test, see load_app()
+
+
+def load_app(root):
+    """Import app.py from `root` on a throwaway database."""
+    global pulse
+    os.environ["DB_DIR"] = tempfile.mkdtemp(prefix="pulse_bench_")
+    os.environ.setdefault("EMIT_COALESCE_WINDOW", "0")
+    sys.path.insert(0, root)
+    import app
+    # Older refs initialize on import
+    if hasattr(app, "start_services"):
+        app.start_services()
+    pulse = app
+
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+@case("timer/build_state")
+def timer_build_state(_db):
+    return pulse.build_state
+
+
+@case("timer/stage_duration_seconds[all levels]")
+def timer_stage_durations(_db):
+    levels = range(len(pulse.LEVELS))
+    return lambda: [pulse.stage_duration_seconds(i, is_break) for i in levels for is_break in (False, True)]
+
+
+@case("rating/calculate_points[30 places]")
+def rating_calculate_points(_db):
+    return lambda: [pulse.calculate_points(place) for place in range(1, 31)]
+
+
+@case("rating/update_players_from_list[100]")
+def rating_update_players(_db):
+    names = [f"Игрок {i}" for i in range(100)]
+    return lambda: pulse.update_players_from_list(names)
+
+
+@case(f"tournament/grid[{TOURNAMENT_PLAYERS}x{TOURNAMENT_GAMES}]")
+def tournament_grid(db):
+    tournament_id = db.execute(
+        "INSERT INTO tournaments (name, month, year) VALUES ('micro', 'Январь', 2100)"
+    ).lastrowid
+    db.executemany("INSERT INTO players (name) VALUES (?)",
+                   [(f"micro {i}",) for i in range(TOURNAMENT_PLAYERS)])
+    ids = [row["id"] for row in db.execute("SELECT id FROM players WHERE name LIKE 'micro %'")]
+    db.executemany("""
+        INSERT INTO tournament_results (tournament_id, player_id, game_number, score)
+        VALUES (?, ?, ?, ?)
+    """, [(tournament_id, pid, game, (pid * game) % 120) for pid in ids for game in range(1, TOURNAMENT_GAMES + 1)])
+    db.executemany("INSERT INTO player_bounties (tournament_id, player_id, bounty) VALUES (?, ?, ?)",
+                   [(tournament_id, pid, pid % 3) for pid in ids])
+    db.commit()
+    return lambda: pulse.build_tournament_grid(db, tournament_id)
+
+
+REGULAR = "micro_regular"
+
+
+def seed_registrations(db, year, registrations):
+    """A year of events (EVENTS_PER_DAY a day) sharing `registrations` registrations.
+
+    REGULAR holds 1% of them, spread evenly over the year; the rest belong
+    to one-off players. Returns the January window.
+    """
+    days = [datetime.date(year, 1, 1) + datetime.timedelta(days=n) for n in range(365 + calendar.isleap(year))]
+    db.executemany("""
+        INSERT INTO events (date, time, event_type, description, max_places)
+        VALUES (?, ?, 'Покер', 'micro', 20)
+    """, [(day.isoformat(), time) for day in days for time in EVENTS_PER_DAY])
+    event_ids = [row["id"] for row in db.execute(
+        "SELECT id FROM events WHERE date BETWEEN ? AND ? ORDER BY date, time", (f"{year}-01-01", f"{year}-12-31")
+    )]
+    regular = registrations // 100
+    step = len(event_ids) / regular
+    rows = [(event_ids[int(n * step)], "micro regular", REGULAR) for n in range(regular)]
+    rows += [(event_ids[i % len(event_ids)], f"micro {i}", f"micro_{i}") for i in range(registrations - regular)]
+    db.executemany("""
+        INSERT INTO event_registrations (event_id, player_name, telegram_id)
+        VALUES (?, ?, ?)
+    """, rows)
+    db.commit()
+    return f"{year}-01-01", f"{year}-01-31"
+
+
+def events_cases(registrations, year):
+    """Both cases seed their own year, so each one runs alone under -k."""
+    label = f"{registrations // 1000}k"
+
+    @case(f"events/feed[{label}]")
+    def events_feed(db):
+        start, end = seed_registrations(db, year, registrations)
+        return lambda: pulse.query_events_feed(db, start, end)
+
+    @case(f"events/user_event_ids[{label}]")
+    def user_event_ids(db):
+        start, end = seed_registrations(db, year + 100, registrations)
+        return lambda: pulse.get_user_event_ids(db, REGULAR, start, end)
+
+
+for index, size in enumerate(REGISTRATION_SIZES):
+    events_cases(size, 2101 + index)
+
+
+def measure(fn, repeat):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [t / number for t in timer.repeat(repeat, number)]
+    return {"best": min(runs), "median": statistics.median(runs), "number": number}
+
+
+def run_suite(pattern, repeat):
+    results = {}
+    with ExitStack() as stack:
+        db = stack.enter_context(pulse.get_db())
+        for name, setup in CASES.items():
+            if pattern and pattern not in name:
+                continue
+            try:
+                fn = setup(db)
+            except AttributeError as e:
+                # The function does not exist in the app being measured
+                print(f"{name:<45} skipped: {e}")
+                continue
+            results[name] = measure(fn, repeat)
+            print(f"{name:<45} best {format_time(results[name]['best'])} "
+                  f"median {format_time(results[name]['median'])}  x{results[name]['number']}")
+    return results
+
+
+def format_time(seconds):
+    for unit, scale in (("s ", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def measure_ref(ref, pattern, repeat):
+    """Run the suite against app.py at git `ref` in a temporary worktree."""
+    workdir = tempfile.mkdtemp(prefix="pulse_micro_")
+    worktree = os.path.join(workdir, "tree")
+    output = os.path.join(workdir, "baseline.json")
+    subprocess.run(["git", "worktree", "add", "--detach", "--quiet", worktree, ref], cwd=ROOT, check=True)
+    try:
+        print(f"⏱ Baseline: {ref}")
+        command = [sys.executable, os.path.abspath(__file__), "run", "--root", worktree,
+                   "--repeat", str(repeat), "--save", output]
+        if pattern:
+            command += ["-k", pattern]
+        subprocess.run(command, check=True)
+        with open(output) as f:
+            return json.load(f)["cases"]
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=ROOT, check=False)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, threshold):
+    """Print the change per case; returns the names that regressed."""
+    regressed = []
+    print(f"\n{'case':<45} {'baseline':>11} {'current':>11}   change")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<45} {'-':>11} {format_time(result['best'])}   new")
+            continue
+        change = result["best"] / before["best"] - 1
+        status = ""
+        if change > threshold:
+            status = "  ❌ regression"
+            regressed.append(name)
+        print(f"{name:<45} {format_time(before['best'])} {format_time(result['best'])} {change:+8.1%}{status}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["run", "compare"])
+    parser.add_argument("-k", dest="pattern", help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="results saved by `run --save`")
+    parser.add_argument("--against", metavar="REF", help="measure this git ref as the baseline instead")
+    parser.add_argument("--root", default=ROOT, help=argparse.SUPPRESS)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.command == "compare":
+        if args.against:
+            baseline = measure_ref(args.against, args.pattern, args.repeat)
+        else:
+            with open(args.baseline) as f:
+                baseline = json.load(f)["cases"]
+
+    load_app(args.root)
+    if args.command == "compare":
+        print("⏱ Current tree")
+    results = run_suite(args.pattern, args.repeat)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cases": results,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Saved {len(results)} cases to {args.save}")
+
+    if baseline is not None:
+        regressed = compare(results, baseline, args.threshold)
+        if regressed:
+            raise SystemExit(f"{len(regressed)} case(s) regressed by more than {args.threshold:.0%}")
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Gunicorn hooks. Loaded automatically from the working directory, so the
+command-line flags in the Dockerfile / amvera.yaml still apply.
+"""
+import threading
+
+
+def post_worker_init(worker):
+    """Warm up the database and start background threads right after the fork.
+
+    Runs in a thread so the worker starts accepting connections at once;
+    a request that arrives before warm-up finishes waits for it in
+    app.start_services().
+    """
+    from app import start_services
+
+    threading.Thread(target=start_services, daemon=True).start()
@@ -0,0 +1,1309 @@
+// Auto-authorize if opened via Telegram Web App
+function initTelegramWebAppAuth() {
+    // Check if Telegram Web App is available
+    if (window.Telegram && window.Telegram.WebApp) {
+        const tg = window.Telegram.WebApp;
+        console.log('📱 Telegram Web App detected');
+        
+        // Initialize Web App
+        tg.ready();
+        tg.expand();
+        
+        // Get user data from Telegram Web App
+        const initData = tg.initData || '';
+        const user = tg.initDataUnsafe?.user;
+        
+        if (user) {
+            console.log('✅ User data from Telegram Web App:', user);
+            
+            const telegramId = user.id.toString();
+            const firstName = user.first_name || '';
+            const lastName = user.last_name || '';
+            const username = user.username || '';
+            
+            // Save to localStorage
+            localStorage.setItem('pulse_telegram_id', telegramId);
+            localStorage.setItem('pulse_player_name', firstName + (lastName ? ' ' + lastName : ''));
+            if (username) {
+                localStorage.setItem('pulse_telegram_username', username);
+            }
+            
+            // Register user in database
+            const registrationData = {
+                telegram_id: telegramId,
+                first_name: firstName,
+                last_name: lastName || '',
+                username: username,
+                language_code: user.language_code || 'ru',
+                is_bot: false,
+                registration_source: 'telegram_webapp'
+            };
+            
+            console.log('📤 Auto-registering user from Telegram Web App:', registrationData);
+            
+            fetch('/api/telegram/register', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify(registrationData)
+            })
+            .then(response => response.json())
+            .then(data => {
+                console.log('✅ User auto-registered from Telegram Web App:', data);
+                // Check user status - don't show modals if already registered
+                return fetch(`/api/telegram/user-status?telegram_id=${encodeURIComponent(telegramId)}`);
+            })
+            .then(response => response.json())
+            .then(data => {
+                console.log('📋 User status after auto-registration:', data);
+                // Only show modals if user hasn't completed registration
+                if (data.ok && data.offer_accepted && data.game_nickname) {
+                    // User already registered - just reload profile
+                    console.log('✅ User already fully registered, skipping modals');
+                    if (typeof loadProfileData === 'function') {
+                        loadProfileData();
+                    }
+                } else if (data.ok && data.offer_accepted && !data.game_nickname) {
+                    // Offer accepted but no nickname - show nickname modal
+                    console.log('📋 Offer accepted but no nickname, showing nickname modal');
+                    const nicknameModal = document.getElementById('nickname-modal');
+                    if (nicknameModal) {
+                        nicknameModal.style.display = 'block';
+                        nicknameModal.classList.add('active');
+                    }
+                } else if (!data.ok || !data.offer_accepted) {
+                    // Offer not accepted - show offer modal
+                    console.log('📋 Offer not accepted, showing offer modal');
+                    const offerModal = document.getElementById('offer-modal');
+                    if (offerModal) {
+                        offerModal.style.display = 'block';
+                        offerModal.classList.add('active');
+                    }
+                } else {
+                    // User status check failed or user not found - don't show modals
+                    console.log('⚠️ User status check failed or user not found, not showing modals');
+                }
+            })
+            .catch(error => {
+                console.error('❌ Error auto-registering user from Telegram Web App:', error);
+            });
+        } else {
+            console.log('⚠️ No user data in Telegram Web App');
+        }
+    } else {
+        console.log('📱 Telegram Web App not available (opened in regular browser)');
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function(){
+    // Initialize Telegram Web App auth first
+    initTelegramWebAppAuth();
+    const audio = document.getElementById('music-player');
+    const toggle = document.getElementById('music-toggle');
+    if(!audio || !toggle) {
+        console.warn('⚠️ Music player or toggle button not found');
+        return;
+    }
+    // Low-bitrate track for phones and data-saver connections
+    const connection = navigator.connection || {};
+    const preferLow = connection.saveData || /(^|-)(2g|3g)$/.test(connection.effectiveType || '') ||
+        window.matchMedia('(max-width: 768px)').matches;
+    audio.src = preferLow ? audio.dataset.srcLow : audio.dataset.src;
+    let isPlaying = false;
+    let savedTime = 0;
+    const isTimerPage = window.location.pathname === '/timer';
+    
+    // Load saved state and time
+    const storedTime = localStorage.getItem('pulse_music_time');
+    const storedState = localStorage.getItem('pulse_music_enabled');
+    // Check if music was explicitly disabled by user
+    const wasDisabled = storedState === 'false';
+    audio.volume = 1;
+    
+    // Check navigation type to determine if this is a page refresh or navigation
+    const navEntry = performance.getEntriesByType('navigation')[0];
+    const isPageRefresh = navEntry && (navEntry.type === 'reload' || navEntry.type === 'navigate');
+    const wasNavigated = sessionStorage.getItem('pulse_navigated');
+    
+    // If page was refreshed (not navigated from another page), reset music
+    if (isPageRefresh && !wasNavigated) {
+        // Page refresh - start music from beginning (only if not disabled by user)
+        if (!wasDisabled) {
+            audio.currentTime = 0;
+            savedTime = 0;
+            localStorage.removeItem('pulse_music_time');
+        } else {
+            // Music was disabled - keep it disabled, don't reset time
+            savedTime = storedTime ? parseFloat(storedTime) : 0;
+            audio.currentTime = savedTime;
+        }
+        sessionStorage.setItem('pulse_navigated', 'true');
+    } else {
+        // Navigation between pages - continue from saved time
+        savedTime = storedTime ? parseFloat(storedTime) : 0;
+        audio.currentTime = savedTime;
+        sessionStorage.setItem('pulse_navigated', 'true');
+    }
+    
+    // Auto-play on all pages except timer (only if music was not disabled by user)
+    if (!isTimerPage && !wasDisabled) {
+        // Set volume to 50%
+        audio.volume = 1;
+        // Try to play music automatically
+        audio.play().then(()=>{
+            isPlaying = true;
+            if(toggle && toggle.querySelector('.music-icon')) {
+                toggle.querySelector('.music-icon').textContent = '🔊';
+            }
+            // Mark as enabled if it plays successfully
+            localStorage.setItem('pulse_music_enabled', 'true');
+        }).catch(()=>{
+            // Auto-play blocked by browser (needs user interaction)
+            // This is normal - user can click to play
+            if(toggle && toggle.querySelector('.music-icon')) {
+                toggle.querySelector('.music-icon').textContent = '🔇';
+            }
+        });
+    } else if (isTimerPage) {
+        // On timer page, pause music (but don't mark as disabled)
+        audio.pause();
+        savedTime = audio.currentTime;
+        isPlaying = false;
+        if(toggle && toggle.querySelector('.music-icon')) {
+            toggle.querySelector('.music-icon').textContent = '🔇';
+        }
+        // Save time when leaving timer page
+        localStorage.setItem('pulse_music_time', savedTime);
+    } else {
+        // Music was disabled by user - don't auto-play
+        audio.pause();
+        isPlaying = false;
+        if(toggle && toggle.querySelector('.music-icon')) {
+            toggle.querySelector('.music-icon').textContent = '🔇';
+        }
+    }
+    
+    toggle.addEventListener('click', function(e){
+        e.preventDefault();
+        if(!isPlaying){
+            // Set volume to 50%
+            audio.volume = 1;
+            // Continue from saved time
+            audio.currentTime = savedTime || 0;
+            audio.play().then(()=>{
+                isPlaying = true;
+                toggle.querySelector('.music-icon').textContent = '🔊';
+                localStorage.setItem('pulse_music_enabled', 'true');
+            }).catch(()=>{
+                alert('Разрешите воспроизведение музыки в браузере.');
+            });
+        } else {
+            audio.pause();
+            savedTime = audio.currentTime;
+            isPlaying = false;
+            toggle.querySelector('.music-icon').textContent = '🔇';
+            localStorage.setItem('pulse_music_enabled', 'false');
+            localStorage.setItem('pulse_music_time', savedTime);
+        }
+    });
+    
+    // Save time periodically when playing (for navigation between pages)
+    setInterval(function(){
+        if(isPlaying && audio.currentTime > 0){
+            savedTime = audio.currentTime;
+            // Save to localStorage so music continues between page navigations
+            localStorage.setItem('pulse_music_time', savedTime);
+        }
+    }, 1000);
+    
+    window.addEventListener('beforeunload', function(){
+        // Save current state when leaving page
+        if(isPlaying){
+            savedTime = audio.currentTime;
+            localStorage.setItem('pulse_music_time', savedTime);
+            localStorage.setItem('pulse_music_enabled', 'true');
+        } else {
+            // Only save as disabled if user manually disabled it (not if on timer page)
+            if(!isTimerPage){
+                localStorage.setItem('pulse_music_enabled', 'false');
+            }
+            // Still save time even if paused, so it can resume later
+            if(savedTime > 0){
+                localStorage.setItem('pulse_music_time', savedTime);
+            }
+        }
+        // Mark that we're navigating (not refreshing) - this will be cleared on refresh
+        // We keep it in sessionStorage to distinguish navigation from refresh
+    });
+    
+    // Clear navigation flag on page refresh (F5, Ctrl+R)
+    // This allows us to detect refresh vs navigation
+    window.addEventListener('pageshow', function(event) {
+        // If page was loaded from cache (back/forward), keep navigation flag
+        // If page was loaded fresh (refresh), clear it
+        if (event.persisted) {
+            // Page loaded from cache (back/forward navigation)
+            // Keep navigation flag so splash doesn't show
+        } else {
+            // Check if this is a refresh by looking at navigation type
+            const navEntry = performance.getEntriesByType('navigation')[0];
+            if (navEntry && navEntry.type === 'reload') {
+                // This is a refresh - clear navigation flag so splash shows
+                sessionStorage.removeItem('pulse_navigated');
+            }
+        }
+    });
+    
+    // Check admin status on page load
+    (function() {
+        const telegramId = localStorage.getItem('pulse_telegram_id');
+        if (telegramId) {
+            // Wait a bit for DOM to be ready
+            setTimeout(function() {
+                checkAdminStatus(telegramId);
+            }, 500);
+        }
+    })();
+    
+    // Profile modal
+    const profileToggle = document.getElementById('profile-toggle');
+    const profileModal = document.getElementById('profile-modal');
+    const profileClose = document.getElementById('profile-close');
+    const profileBackdrop = document.getElementById('profile-backdrop');
+    
+    function loadProfileData() {
+        const telegramId = localStorage.getItem('pulse_telegram_id') || '';
+        const profileNameEl = document.getElementById('profile-name');
+        const profileTelegramEl = document.getElementById('profile-telegram');
+        const profileEditBtn = document.getElementById('profile-edit-name-btn');
+        const authStatusText = document.getElementById('auth-status-text');
+        const telegramWidgetContainer = document.getElementById('telegram-widget-container');
+        
+        // Show loading state
+        if (profileNameEl) profileNameEl.textContent = 'Загрузка...';
+        if (profileTelegramEl) profileTelegramEl.textContent = 'Загрузка...';
+        if (authStatusText) authStatusText.textContent = 'Проверка авторизации...';
+        
+        // If we have telegram_id, check if user exists in database
+        if (telegramId) {
+            fetch(`/api/telegram/user-status?telegram_id=${encodeURIComponent(telegramId)}`)
+                .then(response => response.json())
+                .then(data => {
+                    if (data.ok) {
+                        // User exists in database - hide widget, show authorized status
+                        if (telegramWidgetContainer) telegramWidgetContainer.style.display = 'none';
+                        if (authStatusText) {
+                            authStatusText.textContent = '✅ Вы авторизованы';
+                            authStatusText.style.color = '#4ade80';
+                        }
+                        
+                        // Update localStorage with server data
+                        const fullName = data.first_name + (data.last_name ? ' ' + data.last_name : '');
+                        localStorage.setItem('pulse_player_name', fullName || 'Не зарегистрирован');
+                        if (data.username) {
+                            localStorage.setItem('pulse_telegram_username', data.username);
+                        }
+                        // Check admin status after loading user data
+                        if (telegramId) {
+                            checkAdminStatus(telegramId);
+                        }
+                        
+                        // Update display - show game_nickname instead of first_name
+                        if (profileNameEl) {
+                            const displayName = data.game_nickname || 'Не зарегистрирован';
+                            profileNameEl.textContent = displayName;
+                        }
+                        // Show edit button if user has game_nickname
+                        if (profileEditBtn && data.game_nickname && data.game_nickname !== 'Не зарегистрирован') {
+                            profileEditBtn.style.display = 'block';
+                        }
+                        if (profileTelegramEl) {
+                            if (data.username) {
+                                profileTelegramEl.textContent = '@' + data.username;
+                            } else if (telegramId) {
+                                profileTelegramEl.textContent = 'ID: ' + telegramId;
+                            } else {
+                                profileTelegramEl.textContent = 'Не указан';
+                            }
+                        }
+                    } else {
+                        // User not in database - show widget for registration
+                        if (telegramWidgetContainer) telegramWidgetContainer.style.display = 'block';
+                        if (authStatusText) {
+                            authStatusText.textContent = '🔐 Для записи на события необходимо авторизоваться через Telegram бота (/start)';
+                            authStatusText.style.color = 'var(--text-muted)';
+                        }
+                        
+                        // Fallback to localStorage if server request fails
+                        const playerName = localStorage.getItem('pulse_player_name') || 'Не зарегистрирован';
+                        const telegramUsername = localStorage.getItem('pulse_telegram_username') || '';
+                        
+                        if (profileNameEl) profileNameEl.textContent = playerName;
+                        if (profileEditBtn && playerName && playerName !== 'Не зарегистрирован') {
+                            profileEditBtn.style.display = 'block';
+                        }
+                        if (profileTelegramEl) {
+                            if (telegramUsername) {
+                                profileTelegramEl.textContent = '@' + telegramUsername;
+                            } else if (telegramId) {
+                                profileTelegramEl.textContent = 'ID: ' + telegramId;
+                            } else {
+                                profileTelegramEl.textContent = 'Не указан';
+                            }
+                        }
+                    }
+                })
+                .catch(error => {
+                    console.error('Error loading user data:', error);
+                    // On error, show widget
+                    if (telegramWidgetContainer) telegramWidgetContainer.style.display = 'block';
+                    if (authStatusText) {
+                        authStatusText.textContent = '🔐 Для записи на события необходимо авторизоваться через Telegram бота (/start)';
+                        authStatusText.style.color = 'var(--text-muted)';
+                    }
+                    
+                    // Fallback to localStorage
+                    const playerName = localStorage.getItem('pulse_player_name') || 'Не зарегистрирован';
+                    const telegramUsername = localStorage.getItem('pulse_telegram_username') || '';
+                    
+                    if (profileNameEl) profileNameEl.textContent = playerName;
+                    if (profileEditBtn && playerName && playerName !== 'Не зарегистрирован') {
+                        profileEditBtn.style.display = 'block';
+                    }
+                    if (profileTelegramEl) {
+                        if (telegramUsername) {
+                            profileTelegramEl.textContent = '@' + telegramUsername;
+                        } else if (telegramId) {
+                            profileTelegramEl.textContent = 'ID: ' + telegramId;
+                        } else {
+                            profileTelegramEl.textContent = 'Не указан';
+                        }
+                    }
+                });
+        } else {
+            // No telegram_id - show widget
+            if (telegramWidgetContainer) telegramWidgetContainer.style.display = 'block';
+            if (authStatusText) {
+                authStatusText.textContent = '🔐 Для записи на события необходимо авторизоваться через Telegram бота (/start)';
+                authStatusText.style.color = 'var(--text-muted)';
+            }
+            
+            // No telegram_id, show default
+            const playerName = localStorage.getItem('pulse_player_name') || 'Не зарегистрирован';
+            const telegramUsername = localStorage.getItem('pulse_telegram_username') || '';
+            
+            if (profileNameEl) profileNameEl.textContent = playerName;
+            if (profileEditBtn && playerName && playerName !== 'Не зарегистрирован') {
+                profileEditBtn.style.display = 'block';
+            }
+            if (profileTelegramEl) {
+                if (telegramUsername) {
+                    profileTelegramEl.textContent = '@' + telegramUsername;
+                } else {
+                    profileTelegramEl.textContent = 'Не указан';
+                }
+            }
+        }
+    }
+    
+    // Handle name editing
+    $(document).ready(function() {
+        $('#profile-edit-name-btn').on('click', function() {
+            const profileNameEl = document.getElementById('profile-name');
+            const profileNameEdit = document.getElementById('profile-name-edit');
+            const profileNameInput = document.getElementById('profile-name-input');
+            const profileInfoItem = profileNameEl ? profileNameEl.closest('.profile-info-item') : null;
+            
+            if (profileNameEl && profileNameEdit && profileNameInput) {
+                // Hide display, show edit
+                if (profileInfoItem) profileInfoItem.style.display = 'none';
+                profileNameEdit.style.display = 'flex';
+                profileNameInput.value = profileNameEl.textContent || '';
+                profileNameInput.focus();
+            }
+        });
+        
+        $('#profile-name-save').on('click', function() {
+            const telegramId = localStorage.getItem('pulse_telegram_id');
+            const profileNameInput = document.getElementById('profile-name-input');
+            const gameNickname = profileNameInput ? profileNameInput.value.trim() : '';
+            
+            if (!telegramId) {
+                alert('Telegram ID не найден');
+                return;
+            }
+            
+            if (!gameNickname) {
+                alert('Введите игровой никнейм');
+                return;
+            }
+            
+            // Validate length
+            if (gameNickname.length < 2 || gameNickname.length > 20) {
+                alert('Никнейм должен содержать от 2 до 20 символов');
+                return;
+            }
+            
+            // Allow letters (lat/cyrillic), numbers, underscore, and spaces
+            if (!/^[a-zA-Zа-яА-ЯёЁ0-9_\s]+$/.test(gameNickname)) {
+                alert('Никнейм может содержать только буквы (лат/кирилл), цифры, пробелы и _');
+                return;
+            }
+            
+            // Don't allow only spaces
+            if (!gameNickname.replace(/\s/g, '').replace(/_/g, '')) {
+                alert('Никнейм не может состоять только из пробелов и подчеркиваний');
+                return;
+            }
+            
+            $.ajax({
+                url: '/api/telegram/set-nickname',
+                method: 'POST',
+                contentType: 'application/json',
+                data: JSON.stringify({
+                    telegram_id: telegramId,
+                    game_nickname: gameNickname
+                })
+            })
+            .done(function(data) {
+                if (data.ok) {
+                    console.log('✅ Game nickname saved successfully');
+                    // Reload profile data to get updated nickname
+                    if (typeof loadProfileData === 'function') {
+                        loadProfileData();
+                    }
+                    
+                    // Hide edit, show display
+                    const profileNameEdit = document.getElementById('profile-name-edit');
+                    const profileNameEl = document.getElementById('profile-name');
+                    const profileInfoItem = profileNameEl ? profileNameEl.closest('.profile-info-item') : null;
+                    
+                    if (profileNameEdit) profileNameEdit.style.display = 'none';
+                    if (profileInfoItem) profileInfoItem.style.display = 'flex';
+                } else {
+                    alert('Ошибка: ' + (data.error || 'неизвестная ошибка'));
+                }
+            })
+            .fail(function() {
+                alert('Ошибка при сохранении никнейма');
+            });
+        });
+        
+        $('#profile-name-cancel').on('click', function() {
+            const profileNameEdit = document.getElementById('profile-name-edit');
+            const profileNameEl = document.getElementById('profile-name');
+            const profileInfoItem = profileNameEl ? profileNameEl.closest('.profile-info-item') : null;
+            
+            // Hide edit, show display
+            if (profileNameEdit) profileNameEdit.style.display = 'none';
+            if (profileInfoItem) profileInfoItem.style.display = 'flex';
+        });
+    });
+    
+    // Define onTelegramAuth BEFORE widget initialization to ensure it's available
+    // Telegram auth callback - simple version as in Telegram docs
+    console.log('🔧 Defining window.onTelegramAuth function...');
+    
+    // Make sure it's globally accessible
+    window.onTelegramAuth = function(user) {
+        console.log('🎉 === Telegram auth callback received ===', user);
+        console.log('🎉 Callback function called! User data:', JSON.stringify(user, null, 2));
+        console.log('User object:', JSON.stringify(user, null, 2));
+        
+        if (!user || !user.id) {
+            console.error('Invalid user data received from Telegram');
+            alert('Ошибка: неверные данные от Telegram. Пожалуйста, попробуйте еще раз.');
+            return;
+        }
+        
+        // Immediately save to localStorage for quick display
+        const playerName = user.first_name + (user.last_name ? ' ' + user.last_name : '');
+        const telegramUsername = user.username || '';
+        const telegramId = user.id.toString();
+        
+        console.log('Saving to localStorage:', {
+            playerName,
+            telegramId,
+            telegramUsername
+        });
+        
+        localStorage.setItem('pulse_player_name', playerName);
+        localStorage.setItem('pulse_telegram_id', telegramId);
+        if (telegramUsername) {
+            localStorage.setItem('pulse_telegram_username', telegramUsername);
+        }
+        
+        // Update profile display immediately
+        const profileNameEl = document.getElementById('profile-name');
+        const profileTelegramEl = document.getElementById('profile-telegram');
+        if (profileNameEl) {
+            profileNameEl.textContent = playerName;
+            console.log('Updated profile name:', playerName);
+        }
+        if (profileTelegramEl) {
+            const displayText = telegramUsername ? '@' + telegramUsername : 'ID: ' + telegramId;
+            profileTelegramEl.textContent = displayText;
+            console.log('Updated profile telegram:', displayText);
+        }
+        
+        // First register user in database, then check offer status
+        console.log('📝 Registering user first, then checking offer status...');
+        registerUserThenCheckOffer(user);
+    };
+    
+    // Register user first, then check offer status
+    function registerUserThenCheckOffer(user) {
+        const telegramId = user.id.toString();
+        const playerName = user.first_name + (user.last_name ? ' ' + user.last_name : '');
+        const telegramUsername = user.username || '';
+        
+        const registrationData = {
+            telegram_id: telegramId,
+            first_name: user.first_name || '',
+            last_name: user.last_name || '',
+            username: telegramUsername,
+            language_code: user.language_code || 'ru',
+            is_bot: false,
+            registration_source: 'telegram_widget'
+        };
+        
+        console.log('📤 Registering user in database:', registrationData);
+        
+        // Register user on server first
+        fetch('/api/telegram/register', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(registrationData)
+        })
+        .then(response => {
+            console.log('Registration response status:', response.status);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            console.log('✅ User registered in database:', data);
+            
+            // Now check offer status
+            return fetch(`/api/telegram/user-status?telegram_id=${encodeURIComponent(telegramId)}`);
+        })
+        .then(response => response.json())
+        .then(data => {
+            console.log('📋 User status from server:', data);
+            
+            if (data.ok && data.offer_accepted) {
+                // Offer already accepted, proceed with nickname check
+                console.log('✅ Offer already accepted');
+                if (!data.game_nickname) {
+                    // Show nickname modal
+                    console.log('📋 No nickname set, showing nickname modal');
+                    const nicknameModal = document.getElementById('nickname-modal');
+                    if (nicknameModal) {
+                        nicknameModal.style.display = 'block';
+                        nicknameModal.classList.add('active');
+                    }
+                } else {
+                    // All set
+                    console.log('✅ All set, user is ready');
+                    loadProfileData();
+                    if (telegramId && typeof checkAdminStatus === 'function') {
+                        checkAdminStatus(telegramId);
+                    }
+                }
+            } else {
+                // Offer not accepted, show offer modal
+                console.log('📋 Offer not accepted, showing offer modal');
+                showOfferModal(user);
+            }
+        })
+        .catch(error => {
+            console.error('❌ Error during registration or status check:', error);
+            // If registration fails, still try to show offer modal
+            showOfferModal(user);
+        });
+    }
+    
+    // Show offer modal and handle acceptance
+    function showOfferModal(user) {
+        const offerModal = document.getElementById('offer-modal');
+        if (!offerModal) {
+            console.error('❌ Offer modal not found');
+            // If modal not found, proceed with registration anyway
+            processTelegramAuth(user);
+            return;
+        }
+        
+        // Store user data temporarily to use after offer acceptance
+        window._pendingTelegramUser = user;
+        
+        // Show offer modal
+        offerModal.style.display = 'block';
+        offerModal.classList.add('active');
+        
+        // Handle offer acceptance
+        const offerAcceptBtn = document.getElementById('offer-accept-btn');
+        const offerRejectBtn = document.getElementById('offer-reject-btn');
+        
+        if (offerAcceptBtn) {
+            // Remove old listeners
+            const newAcceptBtn = offerAcceptBtn.cloneNode(true);
+            offerAcceptBtn.parentNode.replaceChild(newAcceptBtn, offerAcceptBtn);
+            
+            newAcceptBtn.addEventListener('click', function() {
+                console.log('✅ Offer accepted, proceeding with registration');
+                acceptOfferAndRegister(user);
+            });
+        }
+        
+        if (offerRejectBtn) {
+            // Remove old listeners
+            const newRejectBtn = offerRejectBtn.cloneNode(true);
+            offerRejectBtn.parentNode.replaceChild(newRejectBtn, offerRejectBtn);
+            
+            newRejectBtn.addEventListener('click', function() {
+                console.log('❌ Offer rejected, deleting user data');
+                const telegramId = user.id.toString();
+                
+                // Delete user data from server
+                fetch('/api/telegram/delete-user', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: JSON.stringify({
+                        telegram_id: telegramId
+                    })
+                })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.ok) {
+                        console.log('✅ User data deleted from server');
+                        // Clear localStorage
+                        localStorage.removeItem('pulse_player_name');
+                        localStorage.removeItem('pulse_telegram_id');
+                        localStorage.removeItem('pulse_telegram_username');
+                        // Close modal
+                        const offerModal = document.getElementById('offer-modal');
+                        if (offerModal) {
+                            offerModal.style.display = 'none';
+                            offerModal.classList.remove('active');
+                        }
+                        // Update profile display
+                        loadProfileData();
+                    } else {
+                        console.error('❌ Error deleting user:', data.error);
+                    }
+                })
+                .catch(error => {
+                    console.error('❌ Error deleting user:', error);
+                });
+            });
+        }
+    }
+    
+    // Accept offer and register user
+    function acceptOfferAndRegister(user) {
+        const telegramId = user.id.toString();
+        
+        // Accept offer on server
+        fetch('/api/telegram/accept-offer', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                telegram_id: telegramId
+            })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.ok) {
+                console.log('✅ Offer accepted on server');
+                // Close offer modal
+                const offerModal = document.getElementById('offer-modal');
+                if (offerModal) {
+                    offerModal.style.display = 'none';
+                    offerModal.classList.remove('active');
+                }
+                // Now proceed with registration
+                processTelegramAuth(user);
+            } else {
+                console.error('❌ Error accepting offer:', data.error);
+                alert('Ошибка при принятии оферты: ' + (data.error || 'неизвестная ошибка'));
+            }
+        })
+        .catch(error => {
+            console.error('❌ Error accepting offer:', error);
+            alert('Ошибка при принятии оферты. Пожалуйста, попробуйте еще раз.');
+        });
+    }
+    
+    // Telegram Login Widget
+    function initTelegramWidget() {
+        console.log('🔧 initTelegramWidget called');
+        
+        const container = document.getElementById('telegram-widget-container');
+        if (!container) {
+            console.error('❌ telegram-widget-container not found!');
+            return;
+        }
+        
+        console.log('✅ Container found:', container);
+        
+        // Verify onTelegramAuth is defined
+        if (typeof window.onTelegramAuth !== 'function') {
+            console.error('❌ window.onTelegramAuth is not a function!', typeof window.onTelegramAuth);
+            container.innerHTML = '<div style="text-align: center; padding: 2vh; color: var(--accent-soft); font-size: 1.3vh;">❌ Ошибка: функция onTelegramAuth не определена. Обновите страницу.</div>';
+            return;
+        }
+        console.log('✅ window.onTelegramAuth is defined');
+        
+        // Remove existing widget if any
+        const existingScript = document.querySelector('script[data-telegram-login]');
+        if (existingScript) {
+            console.log('🗑️ Removing existing widget script');
+            existingScript.remove();
+        }
+        
+        // Clear container
+        container.innerHTML = '<div style="text-align: center; padding: 2vh; color: var(--text-muted); font-size: 1.3vh;">Загрузка виджета...</div>';
+        
+        // Check current domain
+        const currentDomain = window.location.hostname;
+        const isLocalhost = currentDomain === 'localhost' || currentDomain === '127.0.0.1' || currentDomain.startsWith('192.168.');
+        
+        console.log('🌐 Current domain:', currentDomain, 'isLocalhost:', isLocalhost);
+        
+        // Show domain registration notice if needed
+        if (isLocalhost) {
+            container.innerHTML = '<div style="text-align: center; padding: 2vh; color: var(--text-muted); font-size: 1.3vh; line-height: 1.6;">⚠️ Виджет Telegram работает только на зарегистрированном домене.<br><br>Для локальной разработки используйте:<br><code style="background: rgba(0,0,0,0.3); padding: 0.5vh 1vw; border-radius: 4px;">localhost</code><br><br>Или зарегистрируйте домен через @BotFather:<br><code style="background: rgba(0,0,0,0.3); padding: 0.5vh 1vw; border-radius: 4px;">/setdomain</code></div>';
+            return;
+        }
+        
+        // Create widget script exactly as in Telegram documentation
+        const script = document.createElement('script');
+        script.async = true;
+        script.src = 'https://telegram.org/js/telegram-widget.js?22';
+        script.setAttribute('data-telegram-login', 'Pulse_Club_bot');
+        script.setAttribute('data-size', 'large');
+        script.setAttribute('data-radius', '20');
+        script.setAttribute('data-onauth', 'onTelegramAuth');
+        script.setAttribute('data-request-access', 'write');
+        
+        console.log('📝 Widget script attributes set:', {
+            'data-telegram-login': 'Pulse_Club_bot',
+            'data-size': 'large',
+            'data-onauth': 'onTelegramAuth'
+        });
+        
+        // Handle widget script load
+        script.onload = function() {
+            console.log('✅ Telegram widget script loaded successfully');
+            // Check if widget rendered
+            setTimeout(function() {
+                const widgetButton = container.querySelector('iframe, .tgme_widget_login_button, button');
+                if (widgetButton) {
+                    console.log('✅ Widget button found:', widgetButton);
+                    
+                    // Add click listener to detect if button is clicked
+                    if (widgetButton.tagName === 'IFRAME') {
+                        console.log('📋 Widget is an iframe, monitoring for messages...');
+                        
+                        // Listen for messages from iframe (Telegram widget sends messages)
+                        window.addEventListener('message', function(event) {
+                            console.log('📨 Message received from iframe:', event);
+                            console.log('📨 Origin:', event.origin);
+                            console.log('📨 Data:', event.data);
+                            
+                            // Telegram widget sends data via postMessage
+                            if (event.origin === 'https://oauth.telegram.org' && event.data) {
+                                console.log('✅ Message from Telegram OAuth:', event.data);
+                                
+                                let userData = null;
+                                
+                                // Parse data if it's a string
+                                let parsedData = event.data;
+                                if (typeof event.data === 'string') {
+                                    try {
+                                        parsedData = JSON.parse(event.data);
+                                        console.log('📋 Parsed data:', parsedData);
+                                    } catch (e) {
+                                        console.error('❌ Failed to parse JSON:', e);
+                                        return;
+                                    }
+                                }
+                                
+                                // Check for auth_data in the parsed data
+                                if (parsedData && parsedData.auth_data) {
+                                    userData = parsedData.auth_data;
+                                    console.log('🎉 User data extracted from auth_data:', userData);
+                                } else if (parsedData && parsedData.id) {
+                                    // Direct user data
+                                    userData = parsedData;
+                                    console.log('🎉 User data found directly:', userData);
+                                } else if (parsedData && parsedData.user) {
+                                    userData = parsedData.user;
+                                    console.log('🎉 User data found in user field:', userData);
+                                }
+                                
+                                // Process user data if found
+                                if (userData && userData.id) {
+                                    console.log('🎉 User data received via postMessage:', userData);
+                                    console.log('🎉 Calling onTelegramAuth with:', userData);
+                                    
+                                    if (typeof window.onTelegramAuth === 'function') {
+                                        window.onTelegramAuth(userData);
+                                    } else {
+                                        console.error('❌ window.onTelegramAuth is not a function!');
+                                    }
+                                } else {
+                                    // This is normal - not all messages from iframe contain user data
+                                    // Only log if it's actually a Telegram-related message
+                                    if (event.data && typeof event.data === 'object' && event.data.type) {
+                                        console.log('📨 Message from iframe (not user data):', event.data.type);
+                                    }
+                                }
+                            }
+                        });
+                    }
+                } else {
+                    console.warn('⚠️ Widget button not found after load');
+                }
+                
+                // Check for errors after a longer delay
+                setTimeout(function() {
+                    const widgetError = container.querySelector('.tgme_widget_error, [class*="error"]');
+                    if (widgetError) {
+                        const errorText = widgetError.textContent || widgetError.innerText || '';
+                        console.error('❌ Widget error detected:', errorText);
+                        if (errorText.includes('domain') || errorText.includes('invalid') || errorText.includes('Domain')) {
+                            console.error('❌ DOMAIN NOT REGISTERED!');
+                            console.error('💡 Register domain via @BotFather: /setdomain');
+                            console.error('💡 Current domain:', currentDomain);
+                        }
+                    } else {
+                        console.log('✅ No widget errors detected');
+                    }
+                }, 3000);
+            }, 1000);
+        };
+        
+        // Handle widget errors
+        script.onerror = function() {
+            console.error('❌ Failed to load Telegram widget script');
+            container.innerHTML = '<div style="text-align: center; padding: 2vh; color: var(--accent-soft); font-size: 1.3vh; line-height: 1.6;">❌ Ошибка загрузки виджета Telegram.<br><br>Убедитесь, что домен зарегистрирован через @BotFather:<br><code style="background: rgba(0,0,0,0.3); padding: 0.5vh 1vw; border-radius: 4px;">/setdomain</code><br><br>Текущий домен: <code style="background: rgba(0,0,0,0.3); padding: 0.5vh 1vw; border-radius: 4px;">' + currentDomain + '</code></div>';
+        };
+        
+        // Check for domain errors after widget loads
+        setTimeout(function() {
+            const widgetError = container.querySelector('.tgme_widget_error');
+            if (widgetError) {
+                const errorText = widgetError.textContent || '';
+                console.error('❌ Widget error detected:', errorText);
+                if (errorText.includes('domain') || errorText.includes('invalid')) {
+                    container.innerHTML = '<div style="text-align: center; padding: 2vh; color: var(--accent-soft); font-size: 1.3vh; line-height: 1.6;">⚠️ Домен не зарегистрирован в боте.<br><br>Для регистрации домена:<br>1. Откройте @BotFather в Telegram<br>2. Выберите бота <code style="background: rgba(0,0,0,0.3); padding: 0.5vh 1vw; border-radius: 4px;">Pulse_Club_bot</code><br>3. Отправьте команду <code style="background: rgba(0,0,0,0.3); padding: 0.5vh 1vw; border-radius: 4px;">/setdomain</code><br>4. Укажите домен: <code style="background: rgba(0,0,0,0.3); padding: 0.5vh 1vw; border-radius: 4px;">' + currentDomain + '</code></div>';
+                }
+            } else {
+                console.log('✅ No widget errors detected');
+            }
+        }, 2000);
+        
+        console.log('📤 Appending widget script to container');
+        container.appendChild(script);
+        console.log('✅ Widget script appended');
+    }
+    
+    // Process Telegram authentication - register user and show modals if needed
+    function processTelegramAuth(user) {
+        console.log('=== processTelegramAuth called ===', user);
+        
+        const playerName = user.first_name + (user.last_name ? ' ' + user.last_name : '');
+        const telegramUsername = user.username || '';
+        const telegramId = user.id.toString();
+        
+        const registrationData = {
+            telegram_id: telegramId,
+            first_name: user.first_name || '',
+            last_name: user.last_name || '',
+            username: telegramUsername,
+            language_code: user.language_code || 'ru',
+            is_bot: false,
+            registration_source: 'telegram_widget'
+        };
+        
+        console.log('Sending registration data to server:', registrationData);
+        
+        // Register user on server
+        fetch('/api/telegram/register', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(registrationData)
+        })
+        .then(response => {
+            console.log('Registration response status:', response.status);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            console.log('Registration response data:', data);
+            if (data.ok) {
+                console.log('✅ User registered successfully in database');
+                
+                // Check user status BEFORE showing modals
+                return fetch(`/api/telegram/user-status?telegram_id=${encodeURIComponent(telegramId)}`);
+            } else {
+                throw new Error(data.error || 'Registration failed');
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            console.log('📋 User status after registration:', data);
+            
+            if (data.ok && data.offer_accepted && data.game_nickname) {
+                // User already fully registered - don't show modals
+                console.log('✅ User already fully registered (offer accepted + nickname set), skipping modals');
+                // Don't show alert - just silently update profile
+                
+                // Update profile display
+                if (typeof loadProfileData === 'function') {
+                    loadProfileData();
+                }
+                
+                // Check admin status
+                if (telegramId && typeof checkAdminStatus === 'function') {
+                    checkAdminStatus(telegramId);
+                }
+                return;
+            }
+            
+            if (data.ok && data.offer_accepted && !data.game_nickname) {
+                // Offer accepted but no nickname - show nickname modal
+                console.log('📋 Offer accepted but no nickname, showing nickname modal');
+                // Don't show alert - just show nickname modal
+                
+                // Show nickname modal - user must set nickname
+                const nicknameModal = document.getElementById('nickname-modal');
+                if (nicknameModal) {
+                    nicknameModal.style.display = 'block';
+                    nicknameModal.classList.add('active');
+                }
+                return;
+            }
+            
+            if (!data.ok || !data.offer_accepted) {
+                // Offer not accepted - show offer modal
+                console.log('📋 Offer not accepted, showing offer modal');
+                alert('Для продолжения необходимо принять публичную оферту.');
+                
+                const offerModal = document.getElementById('offer-modal');
+                if (offerModal) {
+                    offerModal.style.display = 'block';
+                    offerModal.classList.add('active');
+                }
+                return;
+            }
+        })
+        .catch(error => {
+            console.error('❌ Error during registration or status check:', error);
+            alert('Ошибка при регистрации. Попробуйте еще раз.');
+        });
+    }
+    
+    // Check admin status and update UI
+    function checkAdminStatus(telegramId) {
+        console.log('🔍 checkAdminStatus called with telegramId:', telegramId);
+        
+        if (!telegramId) {
+            console.warn('⚠️ No telegram_id provided to checkAdminStatus');
+            return;
+        }
+        
+        const url = '/api/telegram/check-admin?telegram_id=' + encodeURIComponent(telegramId);
+        console.log('📡 Fetching:', url);
+        
+        fetch(url)
+            .then(response => {
+                console.log('📡 Response status:', response.status);
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                console.log('📡 Response data:', data);
+                
+                if (data.ok && data.is_admin) {
+                    console.log('✅ Admin access granted for telegram_id:', telegramId);
+                    
+                    // Update IS_ADMIN on all pages
+                    // Use window.PULSE_TIMER_IS_ADMIN instead of trying to modify const
+                    if (typeof window.PULSE_TIMER_IS_ADMIN !== 'undefined') {
+                        window.PULSE_TIMER_IS_ADMIN = true;
+                        console.log('✅ PULSE_TIMER_IS_ADMIN set to true');
+                    }
+                    // Also update IS_ADMIN if it's a variable (not const)
+                    try {
+                        if (typeof IS_ADMIN !== 'undefined' && typeof IS_ADMIN === 'boolean') {
+                            // Try to update via window object if available
+                            if (typeof window !== 'undefined') {
+                                window.IS_ADMIN = true;
+                                console.log('✅ window.IS_ADMIN set to true');
+                            }
+                        }
+                    } catch (e) {
+                        // IS_ADMIN is const, can't modify - that's OK, use PULSE_TIMER_IS_ADMIN instead
+                        console.log('ℹ️ IS_ADMIN is const, using PULSE_TIMER_IS_ADMIN instead');
+                    }
+                    
+                    // Show admin panels
+                    const adminPanels = document.querySelectorAll('#admin-panel');
+                    adminPanels.forEach(panel => {
+                        if (panel) {
+                            panel.style.display = 'block';
+                            console.log('✅ Admin panel shown');
+                        }
+                    });
+                    
+                    const toggleAdminBtns = document.querySelectorAll('#toggle-admin');
+                    toggleAdminBtns.forEach(btn => {
+                        if (btn) {
+                            btn.style.display = 'block';
+                            console.log('✅ Admin toggle button shown');
+                        }
+                    });
+                    
+                    // Show add event buttons
+                    const addEventBtns = document.querySelectorAll('.add-event-btn');
+                    addEventBtns.forEach(btn => {
+                        if (btn) {
+                            btn.style.display = 'block';
+                            console.log('✅ Add event button shown');
+                        }
+                    });
+                    
+                    console.log('✅ Admin status updated successfully for telegram_id:', telegramId);
+                } else {
+                    console.warn('⚠️ User is not admin for telegram_id:', telegramId);
+                    console.warn('⚠️ Admin list:', data.admin_list);
+                }
+            })
+            .catch(error => {
+                console.error('❌ Error checking admin status:', error);
+            });
+    }
+    
+    if (profileToggle && profileModal) {
+        profileToggle.addEventListener('click', function() {
+            profileModal.classList.add('active');
+            profileBackdrop.classList.add('active');
+            loadProfileData();
+            // Check admin status when opening profile
+            const telegramId = localStorage.getItem('pulse_telegram_id');
+            if (telegramId) {
+                checkAdminStatus(telegramId);
+            }
+            // Initialize Telegram widget when modal opens (with delay to ensure DOM is ready)
+            console.log('👤 Profile modal opened, initializing Telegram widget...');
+            setTimeout(function() {
+                console.log('⏰ Timeout fired, calling initTelegramWidget...');
+                initTelegramWidget();
+            }, 200);
+        });
+        
+        if (profileClose) {
+            profileClose.addEventListener('click', function() {
+                profileModal.classList.remove('active');
+                profileBackdrop.classList.remove('active');
+            });
+        }
+        
+        if (profileBackdrop) {
+            profileBackdrop.addEventListener('click', function() {
+                profileModal.classList.remove('active');
+                profileBackdrop.classList.remove('active');
+            });
+        }
+    }
+    
+});
+
+// Offer and Nickname modal handlers (available on all pages)
+// Wait for jQuery to be loaded
+(function() {
+    function initModals() {
+        if (typeof jQuery === 'undefined') {
+            setTimeout(initModals, 100);
+            return;
+        }
+        
+        jQuery(document).ready(function($) {
+    // Offer modal handlers
+    $('#offer-accept').on('click', function() {
+        const telegramId = localStorage.getItem('pulse_telegram_id');
+        if (!telegramId) {
+            alert('Telegram ID не найден');
+            return;
+        }
+        
+        $.ajax({
+            url: '/api/telegram/accept-offer',
+            method: 'POST',
+            contentType: 'application/json',
+            data: JSON.stringify({ telegram_id: telegramId })
+        })
+        .done(function(data) {
+            if (data.ok) {
+                $('#offer-modal').removeClass('active').hide();
+                // Check if nickname is set
+                $.ajax({
+                    url: `/api/telegram/user-status?telegram_id=${telegramId}`,
+                    method: 'GET'
+                })
+                .done(function(statusData) {
+                    if (statusData.ok && !statusData.game_nickname) {
+                        $('#nickname-modal').show().addClass('active');
+                    }
+                });
+            } else {
+                alert('Ошибка: ' + (data.error || 'неизвестная ошибка'));
+            }
+        })
+        .fail(function() {
+            alert('Ошибка при принятии оферты');
+        });
+    });
+    
+    $('#offer-decline').on('click', function() {
+        $('#offer-modal').removeClass('active').hide();
+        alert('Для записи на события необходимо принять публичную оферту.');
+    });
+    
+    // Nickname modal handlers
+    $('#nickname-save').on('click', function() {
+        const gameNickname = $('#game-nickname-input').val().trim();
+        const telegramId = localStorage.getItem('pulse_telegram_id');
+        
+        if (!gameNickname) {
+            alert('Введите игровой никнейм');
+            return;
+        }
+        
+        // Validate length
+        if (gameNickname.length < 2 || gameNickname.length > 20) {
+            alert('Никнейм должен содержать от 2 до 20 символов');
+            return;
+        }
+        
+        // Allow letters (lat/cyrillic), numbers, underscore, and spaces
+        if (!/^[a-zA-Zа-яА-ЯёЁ0-9_\s]+$/.test(gameNickname)) {
+            alert('Никнейм может содержать только буквы (лат/кирилл), цифры, пробелы и _');
+            return;
+        }
+        
+        // Don't allow only spaces
+        if (!gameNickname.replace(/\s/g, '').replace(/_/g, '')) {
+            alert('Никнейм не может состоять только из пробелов и подчеркиваний');
+            return;
+        }
+        
+        if (!telegramId) {
+            alert('Telegram ID не найден');
+            return;
+        }
+        
+        $.ajax({
+            url: '/api/telegram/set-nickname',
+            method: 'POST',
+            contentType: 'application/json',
+            data: JSON.stringify({
+                telegram_id: telegramId,
+                game_nickname: gameNickname
+            })
+        })
+        .done(function(data) {
+            if (data.ok) {
+                console.log('✅ Nickname saved successfully');
+                $('#nickname-modal').removeClass('active').hide();
+                $('#game-nickname-input').val('');
+                
+                // Check admin status after nickname is set
+                if (telegramId && typeof checkAdminStatus === 'function') {
+                    checkAdminStatus(telegramId);
+                }
+                
+                // Reload profile data
+                if (typeof loadProfileData === 'function') {
+                    loadProfileData();
+                }
+                
+                if (window.location.pathname === '/' || window.location.pathname === '/dashboard') {
+                    window.location.reload();
+                }
+            } else {
+                alert('Ошибка: ' + (data.error || 'неизвестная ошибка'));
+            }
+        })
+        .fail(function() {
+            alert('Ошибка при сохранении никнейма');
+        });
+    });
+    
+    $('#nickname-cancel, #nickname-modal-close').on('click', function() {
+        $('#nickname-modal').removeClass('active').hide();
+    });
+        });
+    }
+    initModals();
+})();
+
+// Suppress Google Docs iframe errors and other non-critical errors
+(function() {
+    // Suppress error events from iframes
+    window.addEventListener('error', function(e) {
+        if (e.message && (
+            e.message.includes('filesystem:https://docs.google.com') ||
+            e.message.includes('ERR_FILE_NOT_FOUND') ||
+            e.message.includes('page_embed_script.js') ||
+            e.message.includes('peoplestack-pa.client') ||
+            e.filename && e.filename.includes('docs.google.com')
+        )) {
+            e.preventDefault();
+            e.stopPropagation();
+            return true;
+        }
+    }, true);
+    
+    // Suppress console errors from iframes
+    const originalError = console.error;
+    console.error = function(...args) {
+        const message = args.join(' ');
+        if (message.includes('filesystem:https://docs.google.com') ||
+            message.includes('ERR_FILE_NOT_FOUND') ||
+            message.includes('page_embed_script.js') ||
+            message.includes('peoplestack-pa.client') ||
+            message.includes('docs.google.com')) {
+            return; // Suppress these errors
+        }
+        originalError.apply(console, args);
+    };
+    
+    // Suppress resource loading errors
+    window.addEventListener('unhandledrejection', function(e) {
+        if (e.reason && (
+            e.reason.message && (
+                e.reason.message.includes('docs.google.com') ||
+                e.reason.message.includes('ERR_FILE_NOT_FOUND')
+            )
+        )) {
+            e.preventDefault();
+        }
+    });
+})();
@@ -4,7 +4,6 @@ Handles all Telegram bot functionality while sharing the database with the main
 """
 import os
 import json
-import sqlite3
 from datetime import datetime
 
 try:
@@ -18,6 +17,9 @@ except ImportError:
 # Telegram Bot Token
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "8574583723:AAHGnyANIA7z_7yPftV1q_HBoYWH4XkMVnI")
 
+# Bot API server; the load test points it at a local fake
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
+
 # Admin telegram_id for migration notifications
 ADMIN_TELEGRAM_ID = os.environ.get("ADMIN_TELEGRAM_ID", "463639949")
 
@@ -44,7 +46,7 @@ def send_message(chat_id, text, reply_markup=None, parse_mode="HTML", timeout=10
         return {"ok": False, "error": "bot not configured"}
     
     try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+        url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
         payload = {
             "chat_id": chat_id,
             "text": text,
@@ -97,31 +99,6 @@ def handle_start_command(telegram_id, first_name, last_name, username, language_
     # Register user to database using the same logic as website
     try:
         with get_db_func() as db:
-            # Ensure telegram_users table exists (same as website)
-            try:
-                db.execute("SELECT 1 FROM telegram_users LIMIT 1")
-            except sqlite3.OperationalError:
-                print("telegram_users table does not exist, creating it...")
-                db.execute("""
-                    CREATE TABLE IF NOT EXISTS telegram_users (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        telegram_id TEXT NOT NULL UNIQUE,
-                        first_name TEXT NOT NULL,
-                        last_name TEXT,
-                        username TEXT,
-                        language_code TEXT,
-                        is_bot BOOLEAN DEFAULT 0,
-                        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        registration_source TEXT DEFAULT 'telegram_widget',
-                        offer_accepted BOOLEAN DEFAULT 0,
-                        offer_accepted_at TIMESTAMP,
-                        game_nickname TEXT
-                    )
-                """)
-                db.commit()
-                print("telegram_users table created successfully")
-            
             # Check if user exists to preserve offer_accepted and game_nickname
             existing = db.execute(
                 "SELECT offer_accepted, game_nickname FROM telegram_users WHERE telegram_id = ?",
@@ -318,7 +295,7 @@ def process_webhook_update(update, get_db_func):
         print("⚠️ process_webhook_update: No update data")
         return {"ok": False, "error": "no update data"}
     
-    print(f"📨 Processing Telegram update: {json.dumps(update, indent=2)}")
+    print(f"📨 Processing Telegram update: {json.dumps(update, ensure_ascii=False)}")
     
     # Handle message updates
     if "message" in update:
@@ -373,7 +350,7 @@ def get_webhook_info():
         return {"ok": False, "error": "bot not configured"}
     
     try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getWebhookInfo"
+        url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/getWebhookInfo"
         response = requests.get(url, timeout=5)
         return response.json()
     except Exception as e:
@@ -395,7 +372,7 @@ def setup_webhook(webhook_url):
         return {"ok": False, "error": "bot not configured"}
     
     try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/setWebhook"
+        url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/setWebhook"
         params = {"url": webhook_url}
         
         print(f"Calling Telegram API: {url} with params: {params}")
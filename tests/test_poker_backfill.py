@@ -0,0 +1,81 @@
+"""Backfill of the poker action log for states written before it existed."""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DB_DIR", tempfile.mkdtemp(prefix="pulse_test_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import app as pulse  # noqa: E402
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """A database at schema version 1 (before poker_actions), returns a state inserter."""
+    monkeypatch.setattr(pulse, "DB_PATH", str(tmp_path / "pulse.db"))
+    with pulse.get_db() as db:
+        pulse.migration_001_base_schema(db)
+        db.execute("PRAGMA user_version = 1")
+        event_id = db.execute(
+            "INSERT INTO events (date, time, event_type) VALUES ('2026-01-10', '19:00', 'Покер')"
+        ).lastrowid
+
+    def add_state(player_name, **fields):
+        state = {"has_rent": 0, "reentry_count": 0, "addon_count": 0, "bonus_points": 0, **fields}
+        with pulse.get_db() as db:
+            db.execute("""
+                INSERT INTO tournament_player_states
+                (event_id, player_name, has_rent, reentry_count, addon_count, bonus_points)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (event_id, player_name, state["has_rent"], state["reentry_count"],
+                  state["addon_count"], state["bonus_points"]))
+        return event_id
+
+    return add_state
+
+
+def migrate():
+    with pulse.get_db() as db:
+        pulse.migrate_schema(db)
+
+
+def test_repeated_rent_bonus_survives_undo(legacy_db):
+    event_id = legacy_db("Игрок", has_rent=1, bonus_points=300)
+    migrate()
+
+    with pulse.get_db() as db:
+        undone, state = pulse.undo_poker_action(db, event_id, "Игрок")
+    assert undone is not None
+    assert state["bonus_points"] == 200
+    assert state["has_rent"]
+
+
+def test_replay_rebuilds_backfilled_bonus(legacy_db):
+    event_id = legacy_db("Игрок", has_rent=1, reentry_count=1, addon_count=1, bonus_points=500)
+    migrate()
+
+    with pulse.get_db() as db:
+        pulse.replay_poker_actions(db, event_id)
+        state = db.execute(
+            "SELECT bonus_points, reentry_count, addon_count FROM tournament_player_states WHERE event_id = ?",
+            (event_id,),
+        ).fetchone()
+    assert tuple(state) == (500, 1, 1)
+
+
+@pytest.mark.parametrize("fields", [
+    {"has_rent": 1, "bonus_points": 150},
+    {"has_rent": 1, "reentry_count": 2, "bonus_points": 100},
+    {"has_rent": 0, "bonus_points": 200},
+])
+def test_unrebuildable_bonus_is_skipped(legacy_db, fields):
+    event_id = legacy_db("Игрок", **fields)
+    migrate()
+
+    with pulse.get_db() as db:
+        logged = db.execute("SELECT COUNT(*) FROM poker_actions WHERE event_id = ?", (event_id,)).fetchone()[0]
+        bonus = db.execute("SELECT bonus_points FROM tournament_player_states").fetchone()[0]
+    assert logged == 0
+    assert bonus == fields["bonus_points"]
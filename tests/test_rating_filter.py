@@ -0,0 +1,41 @@
+"""Date-filtered /api/rating."""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DB_DIR", tempfile.mkdtemp(prefix="pulse_test_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import app as pulse  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(pulse, "DB_PATH", str(tmp_path / "pulse.db"))
+    monkeypatch.setattr(pulse, "date_participants", {})
+    pulse.init_db()
+    return pulse.app.test_client()
+
+
+def register(date, *names):
+    with pulse.get_db() as db:
+        event_id = db.execute(
+            "INSERT INTO events (date, time, event_type) VALUES (?, '19:00', 'Мафия')", (date,)
+        ).lastrowid
+        db.executemany("INSERT INTO event_registrations (event_id, player_name, telegram_id) VALUES (?, ?, ?)",
+                       [(event_id, name, str(idx)) for idx, name in enumerate(names)])
+
+
+def test_duplicate_names_are_all_returned(client):
+    pulse.update_players_from_list(["Аня", "Борис", "Аня", "Вера"])
+    register("2030-04-01", "Аня", "Вера")
+
+    players = client.get("/api/rating?date=2030-04-01").get_json()["players"]
+    assert [(p["name"], p["place"]) for p in players] == [("Аня", 1), ("Аня", 3), ("Вера", 4)]
+
+
+@pytest.mark.parametrize("date", ["abc", "2030-13-01", "2030-04-01; DROP"])
+def test_invalid_date_is_rejected(client, date):
+    assert client.get("/api/rating", query_string={"date": date}).status_code == 400
@@ -0,0 +1,139 @@
+"""
+Build fingerprinted static assets into static/dist/ (served at /assets/).
+
+For every file in static/ and its subdirectories (css/, js/):
+  - copy it to dist/<dir>/<stem>.<hash>.<ext>, hash = first 10 hex chars of sha256
+  - write .gz (and .br when the brotli module is installed) siblings if
+    compression saves at least 10% (mp3/png/jpg usually don't qualify)
+For the images in IMAGE_VARIANTS (needs Pillow), write downscaled WebP and
+AVIF variants of each width.
+
+The result is recorded in dist/manifest.json, which app.asset_url() and
+app.picture_sources() read. Without a build the app falls back to the
+plain /static/ URLs.
+
+Usage:
+    python tools/build_static.py
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(ROOT, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+
+# Widths (px) of the responsive variants; none exceed the source sizes
+IMAGE_VARIANTS = {
+    "pulse_logo_transparent.png": [128, 256, 512],
+    "1NfSJKb_P2TDCNgGzeQLV9VqFB3YXKqDNJcK9gmaIq_DB5iIgkoDfU-rVoAgrshavGIWa92DHnzZDfqPd3jU2wnX.jpg": [640, 1280],
+}
+MIN_COMPRESSION_SAVING = 0.1
+
+
+def fingerprint(name, content):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+
+def write(name, content):
+    os.makedirs(os.path.dirname(os.path.join(DIST_DIR, name)), exist_ok=True)
+    with open(os.path.join(DIST_DIR, name), "wb") as f:
+        f.write(content)
+
+
+def write_compressed(name, content):
+    """Write .gz/.br siblings where they pay off; returns the encodings written."""
+    encodings = []
+    candidates = [("gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli:
+        candidates.append(("br", brotli.compress(content, quality=11)))
+    for suffix, compressed in candidates:
+        if len(compressed) <= len(content) * (1 - MIN_COMPRESSION_SAVING):
+            write(f"{name}.{suffix}", compressed)
+            encodings.append(suffix)
+    return encodings
+
+
+def image_variants(name, content, widths):
+    """Downscaled WebP/AVIF variants: {format: [[width, hashed name], ...]}."""
+    variants = {}
+    formats = [("webp", "WEBP", {"quality": 82, "method": 6})]
+    if features.check("avif"):
+        formats.append(("avif", "AVIF", {"quality": 60}))
+    source = Image.open(io.BytesIO(content))
+    stem = os.path.splitext(name)[0]
+    for width in widths:
+        height = round(source.height * width / source.width)
+        resized = source.resize((width, height), Image.LANCZOS)
+        for ext, pil_format, options in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            hashed = fingerprint(f"{stem}-{width}.{ext}", buffer.getvalue())
+            write(hashed, buffer.getvalue())
+            variants.setdefault(ext, []).append([width, hashed])
+    return variants
+
+
+def source_files():
+    """Names of the files under static/ relative to it, dist/ excluded."""
+    for directory, subdirs, files in os.walk(STATIC_DIR):
+        subdirs[:] = sorted(d for d in subdirs if os.path.join(directory, d) != DIST_DIR)
+        for name in sorted(files):
+            yield os.path.relpath(os.path.join(directory, name), STATIC_DIR).replace(os.sep, "/")
+
+
+def main():
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+    manifest = {"files": {}, "encodings": {}, "images": {}}
+    before = after = 0
+
+    for name in source_files():
+        with open(os.path.join(STATIC_DIR, name), "rb") as f:
+            content = f.read()
+        hashed = fingerprint(name, content)
+        write(hashed, content)
+        manifest["files"][name] = hashed
+        encodings = write_compressed(hashed, content)
+        if encodings:
+            manifest["encodings"][hashed] = encodings
+
+        line = f"{name[:40]:<40} {len(content) / 1024:9.1f} KB"
+        if Image and name in IMAGE_VARIANTS:
+            variants = image_variants(name, content, IMAGE_VARIANTS[name])
+            manifest["images"][name] = variants
+            for ext, entries in variants.items():
+                largest = os.path.getsize(os.path.join(DIST_DIR, entries[-1][1]))
+                line += f" | {ext} {entries[-1][0]}px {largest / 1024:7.1f} KB"
+            before += len(content)
+            after += min(os.path.getsize(os.path.join(DIST_DIR, entries[-1][1]))
+                         for entries in variants.values())
+        print(line)
+
+    with open(os.path.join(DIST_DIR, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    if not Image:
+        print("⚠️ Pillow not installed: no WebP/AVIF variants")
+    if not brotli:
+        print("⚠️ brotli not installed: gzip only")
+    if before:
+        print(f"✅ Images: {before / 1024:.0f} KB -> {after / 1024:.0f} KB at the largest variant")
+    print(f"✅ Wrote {len(manifest['files'])} assets to {DIST_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Rebuild tournament_player_states from the poker_actions log.
+
+Usage:
+    python tools/replay_poker_actions.py            # every event with logged actions
+    python tools/replay_poker_actions.py --event 42 # a single event
+
+Uses the same DB_DIR / LOCAL_MODE environment as the app. Stop the server
+first: it keeps the live poker tables in memory and would keep serving
+(and writing through) the states this rewrites.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import get_db, init_db, replay_poker_actions, DB_PATH  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild poker player states from the action log")
+    parser.add_argument("--event", type=int, help="event id to rebuild (default: all)")
+    args = parser.parse_args()
+
+    init_db()
+    with get_db() as db:
+        applied = replay_poker_actions(db, args.event)
+    print(f"✅ Replayed {applied} actions into {DB_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,10 +31,11 @@ print(f"Platform: {platform}")
 print(f"Environment: PRODUCTION")
 
 try:
-    # Import app and socketio - this will trigger initialization
+    # Importing only defines the app; the database and background threads
+    # start in gunicorn's post_worker_init hook or on the first request
     # IMPORTANT: Import from app.py, NOT app_local.py
     print("Importing app module (production)...")
-    from app import app, socketio
+    from app import app, socketio, start_services
     print("✅ App module imported successfully")
     
     # For gunicorn with eventlet, we need to use the app directly
@@ -50,6 +51,7 @@ except Exception as e:
     raise
 
 if __name__ == "__main__":
+    start_services()
     port = int(os.environ.get("PORT", "8000"))
-    socketio.run(app, host="0.0.0.0", port=port, allow_unsafe_werkzeug=True)
+    socketio.run(application, host="0.0.0.0", port=port, allow_unsafe_werkzeug=True)
 